@@ -0,0 +1,214 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from sqlite_util import connect
+from dotenv import load_dotenv
+load_dotenv()
+
+AGENTS_DB_PATH = os.getenv("AGENTS_DB_PATH", "data/agents.db")
+CATALOG_POOL_SIZE = int(os.getenv("CATALOG_POOL_SIZE", "8"))
+
+# Descriptive catalog fields, in the order the rest of the code builds agent dicts
+CATALOG_COLUMNS = (
+    "Name", "Provider", "UseCase", "Category", "InputPrice", "OutputPrice",
+    "Integration", "FreeTier", "Latency", "Website", "Alternatives"
+)
+
+# id keeps the rowid the agent had before the migration, so FAISS ids stay valid
+_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS agents (
+        id INTEGER PRIMARY KEY,
+        Name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        Provider TEXT,
+        UseCase TEXT,
+        Category TEXT,
+        InputPrice TEXT,
+        OutputPrice TEXT,
+        Integration TEXT,
+        FreeTier TEXT,
+        Latency TEXT,
+        Website TEXT,
+        Alternatives TEXT,
+        Enriched INTEGER NOT NULL DEFAULT 0,
+        InputUnitPrice REAL,
+        OutputUnitPrice REAL,
+        InputPriceUnit TEXT,
+        OutputPriceUnit TEXT,
+        SourceHash TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_agents_category ON agents(Category)",
+    "CREATE INDEX IF NOT EXISTS idx_agents_provider ON agents(Provider)",
+    "CREATE INDEX IF NOT EXISTS idx_agents_enriched ON agents(Enriched)",
+)
+# Columns added to the legacy table over time (enrichment flag, normalized prices)
+_DERIVED_COLUMNS = ("Enriched", "InputUnitPrice", "OutputUnitPrice", "InputPriceUnit", "OutputPriceUnit")
+
+
+def _create_schema(conn):
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    # Added after the keyed schema shipped: hash of the feed record a row was loaded from
+    if "SourceHash" not in _table_columns(conn, "agents"):
+        conn.execute("ALTER TABLE agents ADD COLUMN SourceHash TEXT")
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _migrate_legacy_table(conn):
+    """
+    Moves an unkeyed legacy ``agents`` table (every column TEXT, duplicate
+    rows from repeated loads) onto the keyed schema. For each name the most
+    recently inserted row wins, since enrichment appended its results as
+    new rows; that row's rowid becomes the agent id.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Checked inside the write lock so concurrent processes migrate only once
+        legacy = _table_columns(conn, "agents")
+        if not legacy or "id" in legacy:
+            conn.rollback()
+            return False
+
+        column_list = ", ".join(c for c in CATALOG_COLUMNS + _DERIVED_COLUMNS if c in legacy)
+        conn.execute("ALTER TABLE agents RENAME TO agents_legacy")
+        _create_schema(conn)
+        conn.execute(f'''
+            INSERT INTO agents (id, {column_list})
+            SELECT rowid, {column_list} FROM agents_legacy
+            WHERE Name IS NOT NULL AND rowid IN (
+                SELECT MAX(rowid) FROM agents_legacy WHERE Name IS NOT NULL GROUP BY Name COLLATE NOCASE
+            )
+        ''')
+        conn.execute("DROP TABLE agents_legacy")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    kept = conn.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+    print(f"✅ Migrated agent catalog to the keyed schema ({kept} unique agents kept).")
+    return True
+
+
+class AgentRecord:
+    """Compact in-memory catalog row (``__slots__``, no per-instance dict)."""
+    __slots__ = ("id",) + CATALOG_COLUMNS + _DERIVED_COLUMNS
+
+    def __init__(self, row):
+        for field, value in zip(self.__slots__, row):
+            setattr(self, field, value)
+
+    def as_dict(self):
+        """Agent dict keyed by CATALOG_COLUMNS (a fresh copy callers may mutate)."""
+        return {column: getattr(self, column) for column in CATALOG_COLUMNS}
+
+
+class AgentCatalog:
+    """
+    Data-access layer for the agent catalog.
+
+    The database runs in WAL mode, so readers (the server, workflow runs)
+    never block on writers such as the price monitor and vice versa.
+    Connections come from a bounded pool shared by all threads; use
+    ``connection()`` for reads and ``transaction()`` for writes.
+
+    ``records()`` serves the whole catalog from memory. A dedicated
+    read-only connection checks ``PRAGMA data_version`` on every access,
+    which changes whenever any other connection (in this process or
+    another) commits, and the catalog is only reloaded when it has.
+    """
+
+    def __init__(self, db_path=AGENTS_DB_PATH, pool_size=CATALOG_POOL_SIZE):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._records = None
+        self._data_version = None
+        self._watch_conn = None
+        self._cache_lock = threading.Lock()
+        self.loads = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self.connection() as conn:
+            _migrate_legacy_table(conn)
+            _create_schema(conn)
+
+    def _create_connection(self):
+        # Pooled connections move between threads, so thread checks are off
+        return connect(self.db_path, check_same_thread=False)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._create_connection()
+        return self._pool.get()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a pooled connection for the duration of the block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrows a connection inside ``BEGIN IMMEDIATE``; commits on success, rolls back on error."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def records(self):
+        """Every agent as an AgentRecord, ordered by id; reloaded only after the catalog changed."""
+        with self._cache_lock:
+            if self._watch_conn is None:
+                self._watch_conn = self._create_connection()
+            version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._records is None or version != self._data_version:
+                rows = self._watch_conn.execute(
+                    f"SELECT {', '.join(AgentRecord.__slots__)} FROM agents ORDER BY id"
+                ).fetchall()
+                self._records = tuple(AgentRecord(row) for row in rows)
+                self._data_version = version
+                self.loads += 1
+            return self._records
+
+    def all_agents(self):
+        """Every agent as a dict keyed by CATALOG_COLUMNS."""
+        return [record.as_dict() for record in self.records()]
+
+    def agents_to_enrich(self):
+        """``(id, agent dict)`` for every agent not enriched yet."""
+        return [(record.id, record.as_dict()) for record in self.records() if not record.Enriched]
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_path=AGENTS_DB_PATH):
+    """Process-wide AgentCatalog for ``db_path`` (created and migrated on first use)."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None:
+            catalog = _catalogs[db_path] = AgentCatalog(db_path)
+        return catalog
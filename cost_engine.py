@@ -0,0 +1,148 @@
+import os
+import re
+import numpy as np
+from pricing import load_agent_prices, UNIT_TOKEN, UNIT_MONTH, UNIT_UNKNOWN
+
+# Usage assumed for one operation of a workflow step, per billing unit
+INPUT_TOKENS_PER_OPERATION = int(os.getenv("COST_INPUT_TOKENS_PER_OPERATION", "1000"))
+OUTPUT_TOKENS_PER_OPERATION = int(os.getenv("COST_OUTPUT_TOKENS_PER_OPERATION", "500"))
+UNITS_PER_OPERATION = {
+    "request": 1.0,
+    "minute": 1.0,
+    "hour": 1.0 / 60,
+    "character": INPUT_TOKENS_PER_OPERATION * 4.0,
+}
+DEFAULT_MONTHLY_VOLUME = 1000
+SCALING_FACTORS = (2, 5, 10)
+
+_NUMBER_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(k|m|thousand|million)?\b', re.IGNORECASE)
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+
+
+def parse_quantity(value):
+    """First number in a free-text quantity ("5,000/month", "10k", "200-300"), or None."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        for v in value.values():
+            quantity = parse_quantity(v)
+            if quantity is not None:
+                return quantity
+        return None
+    match = _NUMBER_PATTERN.search(str(value or ""))
+    if not match:
+        return None
+    return float(match.group(1).replace(",", "")) * _MULTIPLIERS.get((match.group(2) or "").lower(), 1.0)
+
+
+def _primary_agent(matched_agents):
+    """Highest-scoring agent assigned to a step (the one that will actually be billed)."""
+    if not matched_agents:
+        return None
+    return max(matched_agents, key=lambda a: parse_quantity(a.get("suitability_score")) or 0).get("agent_name")
+
+
+def compute_workflow_costs(workflow_analysis, agent_assignments, agent_prices=None):
+    """
+    Computes per-step, total, per-operation and scaled monthly costs locally.
+
+    Each step is billed for its primary (highest-scoring) agent using the
+    normalized unit prices from the catalog. Token-priced agents are charged
+    INPUT/OUTPUT_TOKENS_PER_OPERATION per operation, other usage units once
+    per operation, and subscriptions once per month regardless of volume.
+    The arithmetic for all steps is done in a single NumPy pass.
+    """
+    if agent_prices is None:
+        agent_prices = load_agent_prices()
+
+    default_volume = parse_quantity(workflow_analysis.get("monthly_volume")) or DEFAULT_MONTHLY_VOLUME
+    steps = workflow_analysis.get("key_steps", [])
+
+    names, agents, units = [], [], []
+    volume, in_qty, out_qty, in_price, out_price, is_flat = [], [], [], [], [], []
+    unpriced = []
+    for step in steps:
+        step_name = step.get("step_name", "Unnamed step")
+        agent_name = _primary_agent(agent_assignments.get(step_name, []))
+        price = agent_prices.get((agent_name or "").strip().lower(), (None, None, UNIT_UNKNOWN, UNIT_UNKNOWN))
+        unit = price[2]
+
+        names.append(step_name)
+        agents.append(agent_name)
+        units.append(unit)
+        volume.append(parse_quantity(step.get("estimated_volume")) or default_volume)
+        in_price.append(price[0] if price[0] is not None else np.nan)
+        out_price.append(price[1] if price[1] is not None else np.nan)
+        is_flat.append(unit == UNIT_MONTH)
+        if unit == UNIT_TOKEN:
+            in_qty.append(INPUT_TOKENS_PER_OPERATION)
+            out_qty.append(OUTPUT_TOKENS_PER_OPERATION)
+        else:
+            # Non-token prices are quoted once per unit; "Same as input" must not double-charge
+            in_qty.append(UNITS_PER_OPERATION.get(unit, 1.0))
+            out_qty.append(0.0)
+        if agent_name and unit == UNIT_UNKNOWN:
+            unpriced.append(agent_name)
+
+    volume = np.array(volume, dtype=float)
+    in_price = np.nan_to_num(np.array(in_price, dtype=float))
+    out_price = np.nan_to_num(np.array(out_price, dtype=float))
+    in_qty = np.array(in_qty, dtype=float)
+    out_qty = np.array(out_qty, dtype=float)
+    is_flat = np.array(is_flat, dtype=bool)
+
+    input_costs = np.where(is_flat, in_price, volume * in_qty * in_price)
+    output_costs = np.where(is_flat, 0.0, volume * out_qty * out_price)
+    step_totals = input_costs + output_costs
+    variable_total = float(step_totals[~is_flat].sum())
+    flat_total = float(step_totals[is_flat].sum())
+    total = variable_total + flat_total
+
+    breakdown = []
+    for i, step_name in enumerate(names):
+        if is_flat[i]:
+            assumption = f"Flat subscription of ${in_price[i]:.2f}/month"
+        elif units[i] == UNIT_TOKEN:
+            assumption = (f"{volume[i]:,.0f} operations/month x ({INPUT_TOKENS_PER_OPERATION} input + "
+                          f"{OUTPUT_TOKENS_PER_OPERATION} output tokens)")
+        elif units[i] == UNIT_UNKNOWN:
+            assumption = "No numeric price in catalog (custom/credits-based); excluded from totals"
+        else:
+            assumption = f"{volume[i]:,.0f} operations/month x {in_qty[i]:g} {units[i]}(s) each"
+        breakdown.append({
+            "step_name": step_name,
+            "agents_used": [agents[i]] if agents[i] else [],
+            "price_unit": units[i],
+            "input_costs": round(float(input_costs[i]), 4),
+            "output_costs": round(float(output_costs[i]), 4),
+            "step_total": round(float(step_totals[i]), 4),
+            "volume_assumptions": assumption
+        })
+
+    budget = parse_quantity(workflow_analysis.get("monthly_budget"))
+    suggestions = []
+    if budget and total > budget:
+        suggestions.append(f"Projected cost exceeds the ${budget:,.2f} budget by ${total - budget:,.2f}/month.")
+    if len(step_totals) and step_totals.max() > 0:
+        top = int(np.argmax(step_totals))
+        suggestions.append(
+            f"'{names[top]}' drives {step_totals[top] / total:.0%} of spend; compare cheaper or free-tier alternatives for it."
+        )
+    if unpriced:
+        suggestions.append(f"Request quotes for custom-priced agents: {', '.join(sorted(set(unpriced)))}.")
+
+    return {
+        "total_monthly_cost": round(total, 2),
+        "cost_breakdown": breakdown,
+        "cost_per_operation": round(total / default_volume, 6),
+        "budget_analysis": {
+            "budget_available": budget,
+            "budget_utilization": f"{total / budget:.1%}" if budget else "N/A",
+            "cost_optimization_suggestions": suggestions
+        },
+        "scaling_projections": {
+            f"at_{factor}x_volume": round(variable_total * factor + flat_total, 2)
+            for factor in SCALING_FACTORS
+        },
+        "unpriced_agents": sorted(set(unpriced))
+    }
@@ -1,13 +1,21 @@
-import sqlite3
 from finlight_client import FinlightApi, ApiConfig
 from finlight_client.models import GetArticlesParams
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import os
+from agent_catalog import get_catalog
+from rate_limiter import RateLimiter
 from dotenv import load_dotenv
 load_dotenv()
 
+# Finlight quota and sweep concurrency; override to match your plan
+FINLIGHT_RPM = int(os.getenv("FINLIGHT_RPM", "60"))
+MONITOR_MAX_WORKERS = int(os.getenv("MONITOR_MAX_WORKERS", "8"))
+ARTICLES_PER_AGENT = int(os.getenv("MONITOR_ARTICLES_PER_AGENT", "5"))
 
 # Initialize Finlight client once
 client = FinlightApi(
@@ -16,59 +24,163 @@ client = FinlightApi(
     )
 )
 
-def fetch_finlight_articles(query):
-    params = GetArticlesParams(query=query, limit=5)  # Fetch recent 5 articles
-    response = client.articles.get_basic_articles(params=params)
-    return response.data if response and hasattr(response, 'data') else []
+# Every worker paces its requests through this limiter (request budget only)
+finlight_rate_limiter = RateLimiter(requests_per_minute=FINLIGHT_RPM, tokens_per_minute=FINLIGHT_RPM)
+
+# Keywords for detecting price-related news (increase or decrease)
+increase_keywords = ['price increase', 'cost rise', 'pricing update', 'price hike', 'increase in price']
+decrease_keywords = ['price decrease', 'cost reduction', 'discount', 'price drop', 'price cut', 'reduced cost']
+
+
+def ensure_watermark_table(conn):
+    """Per-agent watermark: publish date and link of the newest article already processed."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS price_monitor_watermarks (
+            agent_id INTEGER PRIMARY KEY,
+            last_publish_date TEXT,
+            last_link TEXT,
+            checked_at TEXT
+        )
+    ''')
+
 
-def analyze_articles_and_update(name, current_input_price, current_output_price):
-    articles = fetch_finlight_articles(name)
-    price_change_flag = None
+def _as_utc(value):
+    """Timezone-aware datetime for a datetime or ISO string; None if missing or unparseable."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
-    # Keywords for detecting price-related news (increase or decrease)
-    increase_keywords = ['price increase', 'cost rise', 'pricing update', 'price hike', 'increase in price']
-    decrease_keywords = ['price decrease', 'cost reduction', 'discount', 'price drop', 'price cut', 'reduced cost']
 
+def _field(article, name):
+    return article.get(name) if isinstance(article, dict) else getattr(article, name, None)
+
+
+def fetch_finlight_articles(query, since=None):
+    """Newest articles for ``query`` (at most ARTICLES_PER_AGENT), only those published on or after ``since``."""
+    params = GetArticlesParams(query=query, pageSize=ARTICLES_PER_AGENT, order="DESC")
+    if since is not None:
+        params.from_ = since.date().isoformat()
+    finlight_rate_limiter.acquire()
+    response = client.articles.get_basic_articles(params=params)
+    articles = _field(response, "articles") if response else None
+    return list(articles or [])
+
+
+def analyze_articles(articles):
+    """Returns the price change flag suggested by the articles' titles and summaries, or None."""
     combined_texts = []
     for article in articles:
-        title = article.title.lower() if article.title else ""
-        summary = article.summary.lower() if article.summary else ""
+        title = (_field(article, "title") or "").lower()
+        summary = (_field(article, "summary") or "").lower()
         combined_texts.append(title + " " + summary)
 
     text_to_search = " ".join(combined_texts)
 
     # Check for price increase keywords
     if any(kw in text_to_search for kw in increase_keywords):
-        price_change_flag = "Possible price increase - check latest pricing"
+        return "Possible price increase - check latest pricing"
     # Check for price decrease keywords
     elif any(kw in text_to_search for kw in decrease_keywords):
-        price_change_flag = "Possible price decrease/discount - check latest pricing"
-
-    if price_change_flag:
-        # Update both Input Price and Output Price in SQLite DB with the flag message
-        conn = sqlite3.connect('data/agents.db')
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE agents SET InputPrice = ?, OutputPrice = ? WHERE Name = ?",
-            (price_change_flag, price_change_flag, name)
+        return "Possible price decrease/discount - check latest pricing"
+    return None
+
+
+def check_agent(name, watermark):
+    """
+    Fetches the articles about one agent published after its watermark.
+
+    Returns ``(new_articles, new_watermark)``; the watermark is unchanged
+    when nothing new was published.
+    """
+    last_date = _as_utc(watermark[0]) if watermark and watermark[0] else None
+    last_link = watermark[1] if watermark else None
+
+    new_articles = []
+    for article in fetch_finlight_articles(name, since=last_date):
+        published = _as_utc(_field(article, "publishDate"))
+        if published is None:
+            # Undated articles cannot be placed against the watermark
+            print(f"⚠️ Skipping article without a publish date for '{name}': {_field(article, 'link')}")
+            continue
+        if last_date is not None and (published < last_date or (published == last_date and _field(article, "link") == last_link)):
+            continue
+        new_articles.append((published, article))
+
+    if not new_articles:
+        return [], watermark
+    newest_date, newest = max(new_articles, key=lambda item: item[0])
+    return [article for _, article in new_articles], (newest_date.isoformat(), _field(newest, "link"))
+
+
+def main(max_workers=MONITOR_MAX_WORKERS):
+    """
+    One monitoring sweep over the whole catalog.
+
+    Agents are checked concurrently behind the Finlight rate limit, and only
+    articles newer than each agent's watermark are fetched and analyzed.
+    All price flags and watermarks are written in a single transaction.
+    """
+    catalog = get_catalog()
+    with catalog.transaction() as conn:
+        ensure_watermark_table(conn)
+    with catalog.connection() as conn:
+        watermarks = {
+            agent_id: (last_date, last_link)
+            for agent_id, last_date, last_link in conn.execute(
+                "SELECT agent_id, last_publish_date, last_link FROM price_monitor_watermarks"
+            )
+        }
+    agents = catalog.records()
+    print(f"Checking news for {len(agents)} AI agents...")
+    started = time.time()
+
+    def check(record):
+        try:
+            return record, check_agent(record.Name, watermarks.get(record.id)), None
+        except Exception as e:
+            return record, None, e
+
+    flag_updates, watermark_updates = [], []
+    errors = 0
+    checked_at = datetime.now(timezone.utc).isoformat()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for record, result, error in executor.map(check, agents):
+            if error is not None:
+                errors += 1
+                print(f"⚠️ Could not fetch news for '{record.Name}': {error}")
+                continue
+            new_articles, watermark = result
+            watermark_updates.append((record.id, watermark[0] if watermark else None,
+                                      watermark[1] if watermark else None, checked_at))
+
+            price_change_flag = analyze_articles(new_articles)
+            if price_change_flag:
+                flag_updates.append((price_change_flag, price_change_flag, record.id))
+                print(f"Updated pricing info for '{record.Name}': {price_change_flag}")
+
+    # Update both Input Price and Output Price with the flag message, plus every watermark, atomically
+    with catalog.transaction() as conn:
+        conn.executemany(
+            "UPDATE agents SET InputPrice = ?, OutputPrice = ?, InputPriceUnit = NULL WHERE id = ?",
+            flag_updates
         )
-        conn.commit()
-        conn.close()
-        print(f"Updated pricing info for '{name}': {price_change_flag}")
-    else:
-        print(f"No pricing changes detected in news for '{name}'")
-
-def main():
-    # Connect to DB and fetch all agent names and their prices
-    conn = sqlite3.connect('data/agents.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT Name, InputPrice, OutputPrice FROM agents")
-    agents = cursor.fetchall()
-    conn.close()
-
-    for name, input_price, output_price in agents:
-        print(f"Checking news for AI agent: {name}")
-        analyze_articles_and_update(name, input_price, output_price)
+        conn.executemany('''
+            INSERT INTO price_monitor_watermarks (agent_id, last_publish_date, last_link, checked_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(agent_id) DO UPDATE SET
+                last_publish_date = excluded.last_publish_date,
+                last_link = excluded.last_link,
+                checked_at = excluded.checked_at
+        ''', watermark_updates)
+
+    print(f"✅ Sweep finished in {time.time() - started:.1f}s: {len(flag_updates)} flagged, "
+          f"{len(watermark_updates)} checked, {errors} failed.")
+    return {"checked": len(watermark_updates), "flagged": len(flag_updates), "failed": errors}
 
 if __name__ == "__main__":
     main()
@@ -1,49 +1,160 @@
+import argparse
+import hashlib
 import json
-import sqlite3
-
-# Load JSON data from file
-with open('data/data.json', 'r') as f:
-    data = json.load(f)  # data is a list of dicts
-
-# Connect to SQLite DB (or create)
-conn = sqlite3.connect('data/agents.db')
-cursor = conn.cursor()
-
-# Create table with columns matching JSON keys
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS agents (
-    Name TEXT,
-    Provider TEXT,
-    UseCase TEXT,
-    Category TEXT,
-    InputPrice TEXT,
-    OutputPrice TEXT,
-    Integration TEXT,
-    FreeTier TEXT,
-    Latency TEXT,
-    Website TEXT,
-    Alternatives TEXT
-)
-''')
-
-# Insert data
-for item in data:
-    cursor.execute('''
-        INSERT INTO agents (Name, Provider, UseCase, Category, InputPrice, OutputPrice, Integration, FreeTier, Latency, Website, Alternatives)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        item.get("Name"),
-        item.get("Provider"),
-        item.get("Use Case"),
-        item.get("Category"),
-        item.get("Input Price"),
-        item.get("Output Price"),
-        item.get("Integration"),
-        item.get("Free Tier"),
-        item.get("Latency"),
-        item.get("Website"),
-        item.get("Alternatives")
-    ))
-
-conn.commit()
-conn.close()
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agent_catalog import get_catalog, CATALOG_COLUMNS, AGENTS_DB_PATH
+
+DEFAULT_SOURCE_PATH = 'data/data.json'
+LOAD_BATCH_SIZE = int(os.getenv("CATALOG_LOAD_BATCH_SIZE", "500"))
+_READ_CHUNK_SIZE = 1 << 16
+
+# Feed keys ("Use Case") mapped to catalog columns ("UseCase"); the column name itself is accepted too
+FEED_KEYS = {
+    "Name": "Name", "Provider": "Provider", "UseCase": "Use Case", "Category": "Category",
+    "InputPrice": "Input Price", "OutputPrice": "Output Price", "Integration": "Integration",
+    "FreeTier": "Free Tier", "Latency": "Latency", "Website": "Website", "Alternatives": "Alternatives"
+}
+
+
+def iter_json_records(path):
+    """
+    Yields the records of a JSON array file or a JSONL file one at a time,
+    without loading the whole file into memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(_READ_CHUNK_SIZE).lstrip()
+        if not buffer.startswith('['):
+            # JSONL: one record per line
+            pending = buffer
+            while True:
+                lines = pending.split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+                chunk = f.read(_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                pending += chunk
+            if pending.strip():
+                yield json.loads(pending)
+            return
+
+        # JSON array: decode one element at a time from a sliding buffer
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(_READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield record
+            buffer = buffer[end:]
+
+
+def _feed_row(item):
+    """Catalog column values for one feed record, in CATALOG_COLUMNS order (Name stripped, as it is looked up)."""
+    row = tuple(item.get(FEED_KEYS[column], item.get(column)) for column in CATALOG_COLUMNS)
+    return (row[0].strip(),) + row[1:] if isinstance(row[0], str) else row
+
+
+def _source_hash(row):
+    return hashlib.sha256(json.dumps(row, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _upsert_batch(conn, batch, counts):
+    """Classifies one batch against the catalog and writes inserts/updates with executemany."""
+    rows = {}
+    for row in batch:
+        rows[row[0].lower()] = row  # the last occurrence of a name in the feed wins
+
+    placeholders = ", ".join("?" * len(rows))
+    existing = {
+        name.lower(): (agent_id, source_hash, tuple(values))
+        for agent_id, name, source_hash, *values in conn.execute(
+            f"SELECT id, Name, SourceHash, {', '.join(CATALOG_COLUMNS)} FROM agents "
+            f"WHERE Name COLLATE NOCASE IN ({placeholders})",
+            [row[0] for row in rows.values()]
+        )
+    }
+
+    inserts, updates, rehashes = [], [], []
+    for key, row in rows.items():
+        row_hash = _source_hash(row)
+        current = existing.get(key)
+        if current is None:
+            inserts.append(row + (row_hash,))
+        elif current[1] == row_hash:
+            counts["unchanged"] += 1
+        elif current[1] is None and current[2] == row:
+            # Loaded before hashes were tracked and still identical
+            rehashes.append((row_hash, current[0]))
+            counts["unchanged"] += 1
+        else:
+            # Changed upstream: earlier enrichment and price normalization are stale
+            updates.append(row[1:] + (row_hash, current[0]))
+
+    columns = ", ".join(CATALOG_COLUMNS)
+    conn.executemany(
+        f"INSERT INTO agents ({columns}, SourceHash) VALUES ({', '.join('?' * (len(CATALOG_COLUMNS) + 1))})",
+        inserts
+    )
+    assignments = ", ".join(f"{column} = ?" for column in CATALOG_COLUMNS[1:])
+    conn.executemany(
+        f"UPDATE agents SET {assignments}, SourceHash = ?, Enriched = 0, InputPriceUnit = NULL WHERE id = ?",
+        updates
+    )
+    conn.executemany("UPDATE agents SET SourceHash = ? WHERE id = ?", rehashes)
+    counts["inserted"] += len(inserts)
+    counts["updated"] += len(updates)
+
+
+def load_catalog(source_path=DEFAULT_SOURCE_PATH, db_path=AGENTS_DB_PATH, batch_size=LOAD_BATCH_SIZE):
+    """
+    Streams agent records from a JSON array or JSONL file into the catalog.
+
+    Records are upserted by name in ``executemany`` batches inside a single
+    transaction. Each row remembers a hash of the feed record it came from,
+    so re-loading the same feed is a no-op even after the row was enriched.
+    Returns ``{"inserted", "updated", "unchanged", "skipped"}``.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+    batch = []
+    with get_catalog(db_path).transaction() as conn:
+        for item in iter_json_records(source_path):
+            row = _feed_row(item) if isinstance(item, dict) else None
+            if not row or not isinstance(row[0], str) or not row[0]:
+                counts["skipped"] += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _upsert_batch(conn, batch, counts)
+                batch = []
+        if batch:
+            _upsert_batch(conn, batch, counts)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load an agent feed (JSON array or JSONL) into the catalog.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE_PATH)
+    parser.add_argument("--db", default=AGENTS_DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    started = time.time()
+    result = load_catalog(args.source, args.db, args.batch_size)
+    print(f"✅ Loaded {args.source} in {time.time() - started:.2f}s: {result['inserted']} inserted, "
+          f"{result['updated']} updated, {result['unchanged']} unchanged, {result['skipped']} skipped.")
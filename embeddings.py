@@ -0,0 +1,84 @@
+import os
+import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
+from rate_limiter import gemini_rate_limiter, estimate_tokens
+from response_cache import PersistentCache, make_cache_key
+from dotenv import load_dotenv
+load_dotenv()
+
+# Gemini embeddings shared by the agent index (rag_implementation) and the
+# report index (qanda). Importing this module has no side effects beyond
+# opening the cache; genai must be configured by the caller.
+
+EMBEDDING_MODEL = "models/embedding-001"
+
+# Embeddings never go stale for the same (model, task type, text), so no TTL
+embedding_cache = PersistentCache(
+    db_path=os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.db"),
+    table="embeddings",
+    ttl_seconds=None,
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+)
+
+def get_embedding(text, task_type="retrieval_document"):
+    cache_key = make_cache_key(EMBEDDING_MODEL, task_type, text)
+    cached = embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    gemini_rate_limiter.acquire(estimate_tokens(text))
+    response = genai.embed_content(
+        model=EMBEDDING_MODEL,
+        content=text,
+        task_type=task_type
+    )
+    embedding_cache.set(cache_key, response["embedding"])
+    return response["embedding"]
+
+# batchEmbedContents accepts at most 100 texts per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))
+
+def _embed_batch(texts, task_type):
+    """One API request for a whole batch; results are written to the embedding cache."""
+    gemini_rate_limiter.acquire(sum(estimate_tokens(text) for text in texts))
+    response = genai.embed_content(
+        model=EMBEDDING_MODEL,
+        content=texts,
+        task_type=task_type
+    )
+    embeddings = response["embedding"]
+    embedding_cache.set_many(
+        (make_cache_key(EMBEDDING_MODEL, task_type, text), embedding) for text, embedding in zip(texts, embeddings)
+    )
+    return embeddings
+
+def get_embeddings(texts, task_type="retrieval_document", batch_size=EMBEDDING_BATCH_SIZE, max_workers=EMBEDDING_MAX_WORKERS):
+    """
+    Batched counterpart of get_embedding; returns embeddings in input order.
+
+    Cached texts are served from the embedding cache. The remaining unique
+    texts are sent ``batch_size`` per request, with up to ``max_workers``
+    requests in flight.
+    """
+    results = {}
+    missing = []
+    seen = set()
+    for text in texts:
+        if text in seen:
+            continue
+        seen.add(text)
+        cached = embedding_cache.get(make_cache_key(EMBEDDING_MODEL, task_type, text))
+        if cached is not None:
+            results[text] = cached
+        else:
+            missing.append(text)
+
+    if missing:
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        print(f"🧮 Embedding {len(missing)} text(s) in {len(batches)} batch request(s)...")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for batch, embeddings in zip(batches, executor.map(lambda b: _embed_batch(b, task_type), batches)):
+                results.update(zip(batch, embeddings))
+
+    return [results[text] for text in texts]
@@ -1,7 +1,10 @@
 import json
 
-def generate_final_summary(business_context, analyzed_task):
-    """Generates the final JSON summary without emojis and without using safe_field()"""
+def generate_final_summary(business_context, analyzed_task, filename="summaries/industrial_workflow_summary.json"):
+    """Generates the final JSON summary without emojis and without using safe_field()
+
+    Pass ``filename=None`` to build the summary without writing it to disk.
+    """
 
     print("\n--- Generating Final Workflow Summary (Industrialist Focused) ---")
 
@@ -77,6 +80,7 @@ def generate_final_summary(business_context, analyzed_task):
             "key_qualitative_benefits_expected": get('qualitative_benefits'),
             "estimated_initial_investment_cost": get('estimated_investment_cost', 'ai'),
             "estimated_simple_payback_period_months": get('estimated_payback_period_months', 'ai'),
+            "simulated_ranges": analyzed_task.get('roi_simulation') or "N/A",
             "overall_roi_potential_rating_and_justification": get('roi_potential_rating_justification', 'ai')
         },
         "implementation_plan_and_feasibility": {
@@ -114,12 +118,12 @@ def generate_final_summary(business_context, analyzed_task):
     summary_json = json.dumps(summary, indent=2, default=str)
     print("\n✅ Workflow Discovery Summary (JSON - Industrialist Focused):")
 
-    filename = f"summaries/industrial_workflow_summary.json"
-    try:
-        with open(filename, 'w') as f:
-            f.write(summary_json)
-        print(f"\n📄 Summary saved to {filename}")
-    except IOError as e:
-        print(f"❌ Error saving summary to file: {e}")
+    if filename:
+        try:
+            with open(filename, 'w') as f:
+                f.write(summary_json)
+            print(f"\n📄 Summary saved to {filename}")
+        except IOError as e:
+            print(f"❌ Error saving summary to file: {e}")
 
     return summary_json
@@ -1,8 +1,37 @@
 import requests,json
 import os
+import threading
+from requests.adapters import HTTPAdapter
+from rate_limiter import gemini_rate_limiter, estimate_tokens
+from response_cache import gemini_response_cache, make_cache_key
 from dotenv import load_dotenv
 load_dotenv()
-GEMINI_API_URL = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={os.getenv("GEMINI_API_KEY")}'
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_API_URL = f'https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={os.getenv("GEMINI_API_KEY")}'
+
+# Connection pool / timeout settings for the shared Gemini HTTP session
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "10"))
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "120"))
+
+
+def _build_http_session(pool_size=GEMINI_POOL_SIZE):
+    """Keep-alive session so repeated Gemini calls reuse TCP/TLS connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+_http_session = _build_http_session()
+
+def write_file_atomic(path, text):
+    """Writes ``text`` to ``path`` via a temp file and rename, so readers and concurrent writers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
 
 def get_user_input(prompt_message, multi_line=False):
     """Gets input from the user."""
@@ -28,10 +57,18 @@ def get_numerical_input(prompt_message, data_type=float):
             print(f"Invalid input. Please enter a valid number ({data_type.__name__}).")
 
 
-def call_gemini_api(prompt_text, schema=None, instruction_type="text generation"):
+def call_gemini_api(prompt_text, schema=None, instruction_type="text generation", use_cache=True):
     """
     Calls the Gemini API with the given prompt and optional schema for JSON output.
+    Successful responses are cached on disk, keyed by model, prompt and schema.
     """
+    cache_key = make_cache_key(GEMINI_MODEL, prompt_text, schema)
+    if use_cache:
+        cached = gemini_response_cache.get(cache_key)
+        if cached is not None:
+            print(f"\n⚡ Using cached Gemini response for {instruction_type}")
+            return cached
+
     print(f"\n🤖 Calling Gemini API for {instruction_type}...")
     payload = {
         "contents": [{"role": "user", "parts": [{"text": prompt_text}]}]
@@ -41,14 +78,17 @@ def call_gemini_api(prompt_text, schema=None, instruction_type="text generation"
             "responseMimeType": "application/json",
             "responseSchema": schema
         }
-    
-    headers = {"Content-Type": "application/json"}
 
     try:
-        response = requests.post(GEMINI_API_URL, json=payload, headers=headers)
+        gemini_rate_limiter.acquire(estimate_tokens(prompt_text))
+        response = _http_session.post(
+            GEMINI_API_URL, json=payload,
+            timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT)
+        )
         response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
         
         result = response.json()
+        gemini_rate_limiter.record_usage(result.get('usageMetadata', {}).get('candidatesTokenCount', 0))
 
         if not result.get('candidates') or not result['candidates'][0].get('content') or not result['candidates'][0]['content'].get('parts'):
             print("❌ Error: Unexpected API response format or no content.")
@@ -59,13 +99,17 @@ def call_gemini_api(prompt_text, schema=None, instruction_type="text generation"
         
         if schema:
             try:
-                return json.loads(api_response_text)
+                parsed = json.loads(api_response_text)
             except json.JSONDecodeError as e:
                 print(f"❌ Error: Could not decode JSON response from API: {e}")
                 print(f"Raw API text: {api_response_text}")
                 return None
         else:
-            return api_response_text
+            parsed = api_response_text
+
+        if use_cache:
+            gemini_response_cache.set(cache_key, parsed)
+        return parsed
 
     except requests.exceptions.RequestException as e:
         print(f"❌ Error calling Gemini API: {e}")
@@ -0,0 +1,86 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+load_dotenv()
+
+# Background workers executing workflow runs submitted in async mode
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+MAX_RETAINED_JOBS = int(os.getenv("MAX_RETAINED_JOBS", "200"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="workflow-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _update(job_id, **fields):
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+
+def _prune_finished_jobs():
+    """Drops the oldest finished jobs once more than MAX_RETAINED_JOBS are kept."""
+    finished = [j for j in _jobs.values() if j["status"] in ("succeeded", "failed")]
+    excess = len(_jobs) - MAX_RETAINED_JOBS
+    for job in sorted(finished, key=lambda j: j["created_at"])[:max(0, excess)]:
+        del _jobs[job["job_id"]]
+
+
+def _run_job(job_id, target, args, kwargs):
+    _update(job_id, status="running", started_at=_now())
+
+    def report_progress(stage):
+        _update(job_id, stage=stage)
+
+    try:
+        result = target(report_progress, *args, **kwargs)
+        _update(job_id, status="succeeded", stage="done", result=result, finished_at=_now())
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        _update(job_id, status="failed", error=str(e), finished_at=_now())
+
+
+def submit_job(target, *args, **kwargs):
+    """
+    Queues ``target(report_progress, *args, **kwargs)`` on the background pool.
+
+    ``report_progress(stage)`` lets the target publish which stage it is in.
+    Returns the new job id.
+    """
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _prune_finished_jobs()
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None
+        }
+    _executor.submit(_run_job, job_id, target, args, kwargs)
+    return job_id
+
+
+def get_job_status(job_id):
+    """Returns the job's status fields (without its result), or None if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k != "result"}
+
+
+def get_job_result(job_id):
+    """Returns the full job record including its result, or None if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
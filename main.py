@@ -8,46 +8,326 @@ from step5 import step5_human_in_the_loop_check_and_data
 from step6 import step6_roi_feasibility_and_implementation
 from step7 import step7_monitoring_feedback_integration_strategy
 from inputs import InputData
-import time
+from response_cache import gemini_response_cache
+from roi_engine import ROI_INPUT_FIELDS, apply_roi_metrics, build_roi_portfolio, simulate_roi
+from run_store import run_store, new_run_id, RunCheckpoints
+from step_cache import memoized_step, memoized_task_step
+from scheduler import run_dag
+from helper import write_file_atomic
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
+import json
+import os
+import threading
+
+# Number of tasks pushed through steps 3-7 at the same time
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+SUMMARY_FILE = "summaries/industrial_workflow_summary.json"
+PORTFOLIO_FILE = "summaries/roi_portfolio.json"
+
+
+# Task fields each per-task step reads. Together with the non-task inputs
+# passed in run_task_pipeline they fingerprint the step for memoization, so a
+# step only re-runs when something it actually reads has changed.
+STEP_TASK_FIELDS = {
+    "step3": ("task_name", "frequency", "characteristics", "tools_used", "dependencies"),
+    "step4": ("task_name", "team", "frequency", "characteristics", "tools_used", "dependencies",
+              "bottleneck_category", "bottleneck_reasoning", "bottleneck_ai_recommendation",
+              "bottleneck_ai_tools_or_methods"),
+    "step5": ("task_name", "characteristics", "ai_categories", "ai_readiness_score", "automation_complexity",
+              "task_segmentation", "bottleneck_reasoning", "tools_used"),
+    "step6": ("task_name",),
+    "step7": ("task_name",),
+}
+
+
+def _task_step_inputs(step_name, task, **other_inputs):
+    inputs = {field: task.get(field) for field in STEP_TASK_FIELDS[step_name]}
+    inputs.update(other_inputs)
+    return inputs
+
+
+def _business_context_inputs(inputs):
+    """The InputData fields step 1 reads."""
+    return {
+        "industry_model": inputs.industry_model,
+        "company_size": inputs.company_size,
+        "goals": inputs.goals.strip(),
+        "top_challenges": inputs.top_challenges.strip(),
+        "tools_platforms": inputs.tools_platforms,
+        "departments_str": inputs.departments_str,
+    }
+
+
+def _has_department_tasks(business_context):
+    """Step 1 only counts as done if Gemini suggested department tasks."""
+    return bool(business_context.get('department_tasks'))
+
+
+def _workflow_discovery_inputs(business_context, inputs):
+    """The departments and team summaries step 2 reads."""
+    departments = business_context.get('departments', [])
+    return {
+        "departments": departments,
+        "team_summaries": {dept: inputs.team_summaries.get(dept, "").strip() for dept in departments},
+    }
+
+
+def _task_steps(business_context, inputs):
+    """
+    ``(step name, runner)`` for steps 3-7. Each runner updates a task in
+    place, memoized on its inputs, and returns the fields it changed.
+    """
+    return [
+        ("step3", lambda task: memoized_task_step(
+            "step3", _task_step_inputs("step3", task, clue=inputs.optional_bottleneck_clues.get(task['task_name'], "").strip()),
+            task, lambda t: step3_identify_bottlenecks(t, inputs)
+        )),
+        ("step4", lambda task: memoized_task_step(
+            "step4", _task_step_inputs("step4", task), task, step4_match_to_ai_primitives
+        )),
+        ("step5", lambda task: memoized_task_step(
+            "step5", _task_step_inputs("step5", task), task, step5_human_in_the_loop_check_and_data  # Renamed and enhanced
+        )),
+        ("step6", lambda task: memoized_task_step(
+            "step6", _task_step_inputs("step6", task, business_context=business_context, roi_inputs=inputs.roi_inputs),
+            task, lambda t: step6_roi_feasibility_and_implementation(t, business_context, inputs)  # Renamed and enhanced
+        )),
+        ("step7", lambda task: memoized_task_step(
+            "step7", _task_step_inputs(
+                "step7", task, step7_inputs=inputs.step7_inputs,
+                goals=business_context.get('goals'), ai_initiatives=business_context.get('ai_initiatives')
+            ),
+            task, lambda t: step7_monitoring_feedback_integration_strategy(t, business_context, inputs)  # Renamed and enhanced
+        )),
+    ]
+
+
+# Data dependencies between steps 3-7. Step 6 only reads the task name,
+# business context and roi_inputs, and step 7 the task name, goals and
+# step7_inputs, so both run alongside the step 3 -> 4 -> 5 chain.
+TASK_STEP_DEPENDENCIES = {
+    "step3": (),
+    "step4": ("step3",),
+    "step5": ("step4",),
+    "step6": (),
+    "step7": (),
+}
+
+
+# --- Task Pipeline ---
+def run_task_pipeline(task, business_context, inputs, task_number=1, checkpoints=None):
+    """
+    Runs steps 3-7 for a single task and returns its final summary JSON.
+
+    Steps are scheduled by TASK_STEP_DEPENDENCIES, so independent ones make
+    their Gemini calls concurrently. Each step works on its own snapshot of
+    the task and its changes are merged back when it finishes. With
+    ``checkpoints`` every step's changes are saved, and steps that already
+    completed in a resumed run are restored instead of re-run.
+    """
+    print(f"Task: {task['task_name']} ({task['team']}) - Frequency: {task['frequency']}")
+    task_lock = threading.Lock()
+
+    def make_node(step_name, run_step):
+        def node():
+            stage = f"task_{task_number}:{step_name}"
+            changes = checkpoints.get(stage) if checkpoints else None
+            if changes is not None:
+                print(f"⏩ {step_name} already completed for task: {task['task_name']}")
+            else:
+                with task_lock:
+                    snapshot = copy.deepcopy(task)
+                changes = run_step(snapshot)
+                # An empty delta means the step produced nothing; leave it to be retried on resume
+                if checkpoints and changes:
+                    checkpoints.save(stage, changes)
+            with task_lock:
+                task.update(changes)
+        return node
+
+    run_dag(
+        {step_name: make_node(step_name, run_step) for step_name, run_step in _task_steps(business_context, inputs)},
+        TASK_STEP_DEPENDENCIES
+    )
+
+    # Scoped to the run so concurrent runs never overwrite each other's summaries
+    run_prefix = f"{checkpoints.run_id}_" if checkpoints else ""
+    return generate_final_summary(
+        business_context, task,
+        filename=f"summaries/industrial_workflow_summary_{run_prefix}{task_number}.json"
+    )
+
+
+def run_task_pipelines(all_tasks, business_context, inputs, max_workers=PIPELINE_MAX_WORKERS, checkpoints=None):
+    """
+    Pushes every task through steps 3-7 concurrently.
+
+    Returns one final summary per task, in the order step 2 produced them.
+    A task whose pipeline fails is reported and left out of the results.
+    """
+    summaries = [None] * len(all_tasks)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(run_task_pipeline, task, business_context, inputs, i + 1, checkpoints): i
+            for i, task in enumerate(all_tasks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                summaries[i] = future.result()
+            except Exception as e:
+                print(f"❌ Pipeline failed for task '{all_tasks[i].get('task_name')}': {e}")
+
+    return [s for s in summaries if s is not None]
+
 
 # --- Main Application Logic ---
-def main(inputs):
-    """Main function to run the AI Workflow Discovery Framework."""
+def main(inputs=None, max_workers=PIPELINE_MAX_WORKERS, run_id=None, resume=False):
+    """
+    Main function to run the AI Workflow Discovery Framework.
+
+    Every step is checkpointed in the run store under ``run_id`` (a new id
+    if not given), and the analyzed tasks are stored there at the end so
+    run_what_if can revisit the numbers later. ``resume=True`` continues an
+    earlier run from its first incomplete step, using the inputs it was
+    started with unless new ones are passed.
+    """
+    if resume:
+        run = run_store.load_run(run_id) if run_id else None
+        if run is None:
+            raise ValueError(f"Cannot resume unknown run '{run_id}'")
+        if inputs is None:
+            inputs = InputData()
+            vars(inputs).update(run["inputs"])
+    inputs = inputs or InputData()
+    run_id = run_id or new_run_id()
+    run_store.start_run(run_id, inputs)
+    checkpoints = RunCheckpoints(run_store, run_id, resume=resume)
+
     print("🚀 Welcome to the AI Workflow Discovery Framework (Industrialist Edition)! 🚀")
     print("This tool will guide you through 7 steps to identify and analyze workflows for AI improvement, focusing on practical and strategic insights.")
-    
-    business_context = step1_collect_business_context(inputs)
-    
-    # selected_task_for_analysis = step2_identify_team_specific_workflows(business_context, inputs)
-    all_tasks = step2_identify_team_specific_workflows(business_context, inputs)
-    summary = 0
-    if all_tasks:
-        print(f"\nTotal tasks identified: {len(all_tasks)}")
-        # You can then loop over all_tasks for further processing or next steps
-        for task in all_tasks[:1]:
-            print(f"Task: {task['task_name']} ({task['team']}) - Frequency: {task['frequency']}")
-            step3_identify_bottlenecks(task, inputs)
-            time.sleep(10)
+    print(f"🆔 Run id: {run_id}")
 
-            step4_match_to_ai_primitives(task)
-            time.sleep(10)
+    try:
+        business_context = checkpoints.run(
+            "step1",
+            lambda: memoized_step(
+                "step1", _business_context_inputs(inputs), lambda: step1_collect_business_context(inputs),
+                is_complete=_has_department_tasks
+            ),
+            is_complete=_has_department_tasks
+        )
 
-            step5_human_in_the_loop_check_and_data(task) # Renamed and enhanced
-            time.sleep(10)
+        # selected_task_for_analysis = step2_identify_team_specific_workflows(business_context, inputs)
+        all_tasks = checkpoints.run(
+            "step2",
+            lambda: memoized_step(
+                "step2", _workflow_discovery_inputs(business_context, inputs),
+                lambda: step2_identify_team_specific_workflows(business_context, inputs)
+            ),
+            is_complete=bool
+        )
+    except Exception:
+        run_store.set_status(run_id, "failed")
+        raise
 
-            step6_roi_feasibility_and_implementation(task, business_context, inputs) # Renamed and enhanced
-            time.sleep(10)
+    summaries = []
+    if all_tasks:
+        print(f"\nTotal tasks identified: {len(all_tasks)}")
+        summaries = run_task_pipelines(all_tasks, business_context, inputs, max_workers=max_workers, checkpoints=checkpoints)
+
+        # Combined summary of the latest run (read by rag_implementation.main1 when run on its own)
+        try:
+            write_file_atomic(SUMMARY_FILE, json.dumps([json.loads(s) for s in summaries], indent=2))
+            print(f"\n📄 Combined summary for {len(summaries)} task(s) saved to {SUMMARY_FILE}")
+        except IOError as e:
+            print(f"❌ Error saving combined summary to file: {e}")
 
-            step7_monitoring_feedback_integration_strategy(task, business_context, inputs) # Renamed and enhanced
-            time.sleep(10)
+        # Rank every task that made it through step 6 by payback period
+        analyzed = {i + 1: task for i, task in enumerate(all_tasks) if 'calculated_potential_cost_saving_per_month' in task}
+        analyzed_tasks = list(analyzed.values())
+        portfolio = build_roi_portfolio(analyzed_tasks)
+        print("\n🏆 ROI Portfolio (ranked by payback):")
+        for entry in portfolio:
+            print(f"{entry['rank']}. [{entry['team']}] {entry['task_name']} - "
+                  f"payback {entry['payback_months'] if entry['payback_months'] is not None else 'N/A'} months, "
+                  f"saves ${entry['monthly_cost_saving'] or 0:,.2f}/month")
+        try:
+            write_file_atomic(PORTFOLIO_FILE, json.dumps(portfolio, indent=2))
+        except IOError as e:
+            print(f"❌ Error saving ROI portfolio to file: {e}")
 
-            summary = generate_final_summary(business_context, task)
+        # Runs with failed tasks stay resumable from their last checkpoint
+        status = "completed" if len(summaries) == len(all_tasks) else "incomplete"
+        try:
+            run_store.save_run(run_id, business_context, inputs, analyzed, status=status)
+            print(f"\n💾 Run stored as {run_id} ({status})")
+        except Exception as e:
+            print(f"❌ Error storing run {run_id}: {e}")
 
     else:
         print("No tasks identified.")
-    return summary
+        run_store.set_status(run_id, "failed")
+
+    cache_stats = gemini_response_cache.stats()
+    print(f"\n🗄️ Gemini response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['entries']} entries stored)")
+    return summaries
+
+
+# --- What-If Analysis ---
+def run_what_if(run_id, overrides, task_numbers=None):
+    """
+    Recomputes the step 6 financials, final summaries and ROI portfolio of a
+    stored run with ``overrides`` applied to its ROI inputs. Only stored LLM
+    outputs are used, so no Gemini calls are made and nothing is written.
+
+    Returns None if the run is unknown; raises ValueError for fields that
+    cannot be overridden or numeric fields that are not numbers.
+    """
+    run = run_store.load_run(run_id)
+    if run is None:
+        return None
+
+    allowed = set(ROI_INPUT_FIELDS) | set(run["inputs"].get("roi_inputs") or {})
+    unknown = sorted(set(overrides) - allowed)
+    if unknown:
+        raise ValueError(f"Cannot override {', '.join(unknown)}; allowed fields: {', '.join(sorted(allowed))}")
+    overrides = dict(overrides)
+    for field in ROI_INPUT_FIELDS:
+        if field in overrides:
+            try:
+                overrides[field] = float(overrides[field])
+            except (TypeError, ValueError):
+                raise ValueError(f"'{field}' must be a number, got {overrides[field]!r}")
+
+    tasks, summaries = [], []
+    for number, task in run["tasks"].items():
+        if task_numbers and number not in task_numbers:
+            continue
+        task.update(overrides)
+        apply_roi_metrics(task)
+        task['roi_simulation'] = simulate_roi(task)
+        tasks.append(task)
+        summaries.append({
+            "task_number": number,
+            "summary": json.loads(generate_final_summary(run["business_context"], task, filename=None))
+        })
+
+    return {
+        "run_id": run_id,
+        "overrides": overrides,
+        "summaries": summaries,
+        "portfolio": build_roi_portfolio(tasks)
+    }
 
 
 if __name__ == "__main__":
-    inputs = InputData()
-    main(inputs)
\ No newline at end of file
+    import sys
+    # python main.py --resume <run_id> picks a failed run up at its first incomplete step
+    if len(sys.argv) == 3 and sys.argv[1] == "--resume":
+        main(run_id=sys.argv[2], resume=True)
+    else:
+        inputs = InputData()
+        main(inputs)
@@ -0,0 +1,126 @@
+import re
+from agent_catalog import AGENTS_DB_PATH, get_catalog
+
+# Billing units after normalization
+UNIT_TOKEN = "token"
+UNIT_REQUEST = "request"
+UNIT_MINUTE = "minute"
+UNIT_MONTH = "month"      # flat subscription
+UNIT_FREE = "free"
+UNIT_UNKNOWN = "unknown"  # custom / credits / depends on another product
+
+_UNIT_ALIASES = [
+    (re.compile(r'^(tokens?|tok)$'), UNIT_TOKEN),
+    (re.compile(r'^(calls?|requests?|units?|images?|pages?|queries|query|operations?|ops|zaps?|chats?)$'), UNIT_REQUEST),
+    (re.compile(r'^(min|mins|minutes?)$'), UNIT_MINUTE),
+    (re.compile(r'^(hr|hrs|hours?)$'), "hour"),
+    (re.compile(r'^(characters?|chars?)$'), "character"),
+    (re.compile(r'^(mo|month|monthly)$'), UNIT_MONTH),
+]
+_SCALE_WORDS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+
+# "$0.01 / 1K tokens", "$0.10 per 1,000 calls", "$39/mo", "$0.006 / min", "$2.50 per million tokens",
+# and the currency-code forms "USD 0.01 per 1K tokens", "US$39/mo", "0.01 USD / 1K tokens"
+_AMOUNT = r'\d[\d,]*(?:\.\d+)?|\.\d+'
+_PRICE_PATTERN = re.compile(
+    r'(?:(?:us\$|\$|\busd\b)\s*(?P<amount>' + _AMOUNT + r')|(?P<amount_suffixed>' + _AMOUNT + r')\s*usd\b)\s*'
+    r'(?:(?:/|per)\s*(?P<qty>\d[\d,]*(?:\.\d+)?)?\s*(?P<scale>k|m|thousand|million)?\b\s*'
+    r'(?:input\s+|output\s+)?(?P<unit>[a-z]+))?',
+    re.IGNORECASE
+)
+
+
+def _normalize_unit(word):
+    word = (word or "").lower()
+    for pattern, unit in _UNIT_ALIASES:
+        if pattern.match(word):
+            return unit
+    return None
+
+
+def parse_price(text, same_as=None):
+    """
+    Parses a free-text price into ``{"unit_price": float | None, "unit": str}``.
+
+    ``unit_price`` is the cost of a single unit (one token, one request, one
+    minute, or one month for subscriptions). "Same"/"Same as input" returns
+    ``same_as``. Prices that cannot be expressed as a number (custom pricing,
+    credits, "depends on the LLM") come back as unit "unknown" with no price.
+    """
+    if text is None or not str(text).strip():
+        return {"unit_price": None, "unit": UNIT_UNKNOWN}
+    lowered = str(text).strip().lower()
+
+    if lowered.startswith("same") and same_as is not None:
+        return dict(same_as)
+
+    match = _PRICE_PATTERN.search(lowered)
+    if match:
+        amount = float((match.group("amount") or match.group("amount_suffixed")).replace(",", ""))
+        quantity = float(match.group("qty").replace(",", "")) if match.group("qty") else 1.0
+        quantity *= _SCALE_WORDS.get((match.group("scale") or "").lower(), 1.0)
+        unit = _normalize_unit(match.group("unit"))
+        if unit is None and match.group("unit") and match.group("unit").lower() in _SCALE_WORDS:
+            unit = UNIT_TOKEN  # "$2 per million" is used for tokens in practice
+        if unit is None:
+            unit = UNIT_MONTH if "mo" in lowered or "plan" in lowered else UNIT_REQUEST
+        return {"unit_price": amount / quantity, "unit": unit}
+
+    if "free" in lowered or lowered.startswith("included") or "open-source" in lowered or "open source" in lowered:
+        return {"unit_price": 0.0, "unit": UNIT_FREE}
+
+    return {"unit_price": None, "unit": UNIT_UNKNOWN}
+
+
+def normalize_agent_price(input_price, output_price):
+    """Normalized (input, output) price pair for one catalog row."""
+    input_parsed = parse_price(input_price)
+    output_parsed = parse_price(output_price, same_as=input_parsed)
+    # "Paid plans for scale" / "Premium available" describe upsells, not a usage price
+    if output_parsed["unit"] == UNIT_UNKNOWN and input_parsed["unit"] == UNIT_FREE:
+        output_parsed = dict(input_parsed)
+    return input_parsed, output_parsed
+
+
+def normalize_agent_prices(db_path=AGENTS_DB_PATH):
+    """Parses InputPrice/OutputPrice for every agent and stores the numeric columns."""
+    catalog = get_catalog(db_path)
+    updates = []
+    unparsed = set()
+    for record in catalog.records():
+        input_parsed, output_parsed = normalize_agent_price(record.InputPrice, record.OutputPrice)
+        # Prices with digits that still came back unknown are formats the parser is missing
+        for raw, parsed in ((record.InputPrice, input_parsed), (record.OutputPrice, output_parsed)):
+            if parsed["unit"] == UNIT_UNKNOWN and raw and re.search(r'\d', str(raw)):
+                unparsed.add(str(raw).strip())
+        updates.append((
+            input_parsed["unit_price"], output_parsed["unit_price"],
+            input_parsed["unit"], output_parsed["unit"], record.id
+        ))
+    with catalog.transaction() as conn:
+        conn.executemany(
+            "UPDATE agents SET InputUnitPrice = ?, OutputUnitPrice = ?, InputPriceUnit = ?, OutputPriceUnit = ? WHERE id = ?",
+            updates
+        )
+
+    unknown = sum(1 for u in updates if u[2] == UNIT_UNKNOWN)
+    print(f"✅ Normalized prices for {len(updates)} agents ({unknown} without a numeric price).")
+    if unparsed:
+        shown = sorted(unparsed)[:10]
+        print(f"⚠️ {len(unparsed)} price string(s) could not be parsed, e.g.: {'; '.join(shown)}")
+    return len(updates)
+
+
+def load_agent_prices(db_path=AGENTS_DB_PATH):
+    """Returns ``{lower-cased agent name: (input_price, output_price, input_unit, output_unit)}``."""
+    prices = {}
+    for record in get_catalog(db_path).records():
+        in_price, out_price = record.InputUnitPrice, record.OutputUnitPrice
+        in_unit, out_unit = record.InputPriceUnit, record.OutputPriceUnit
+        if in_unit is None:
+            # Row added after the last normalization pass
+            input_parsed, output_parsed = normalize_agent_price(record.InputPrice, record.OutputPrice)
+            in_price, in_unit = input_parsed["unit_price"], input_parsed["unit"]
+            out_price, out_unit = output_parsed["unit_price"], output_parsed["unit"]
+        prices[(record.Name or "").strip().lower()] = (in_price, out_price, in_unit, out_unit)
+    return prices
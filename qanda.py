@@ -1,46 +1,80 @@
 import google.generativeai as genai
 from datetime import datetime
+import hashlib
 import os
+import threading
+import time
+from rate_limiter import gemini_rate_limiter, estimate_tokens
+from embeddings import get_embedding
+from report_index import ReportIndex
+from semantic_cache import SemanticCache
 from dotenv import load_dotenv
 load_dotenv()
 # Global variables for caching
 _workflow_report = None
+_report_index = None
 _gemini_model = None
 
-def initialize_chatbot(api_key=os.getenv("GEMINI_API_KEY"), report_file_path="reports/workflow_formal_report.txt"):
+# Report change detection
+REPORT_FILE_PATH = "reports/workflow_formal_report.txt"
+REPORT_CHECK_INTERVAL_SECONDS = float(os.getenv("REPORT_CHECK_INTERVAL_SECONDS", "5"))
+_report_path = None
+_report_stat = None
+_report_hash = None
+_report_checked_at = 0.0
+_init_lock = threading.Lock()
+_report_lock = threading.RLock()
+
+# Report retrieval: how many chunks, and how many tokens of them, go into each prompt
+REPORT_TOP_K = int(os.getenv("REPORT_TOP_K", "5"))
+REPORT_CONTEXT_TOKEN_BUDGET = int(os.getenv("REPORT_CONTEXT_TOKEN_BUDGET", "2000"))
+
+# Semantic answer cache: paraphrased questions about the same report reuse the stored answer
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.92"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+_answer_cache = SemanticCache(ANSWER_CACHE_SIMILARITY_THRESHOLD, ANSWER_CACHE_MAX_ENTRIES)
+
+def initialize_chatbot(api_key=os.getenv("GEMINI_API_KEY"), report_file_path=REPORT_FILE_PATH, force=False):
     """
     Initialize the chatbot components (call this once when server starts)
+
+    Repeated calls are cheap: Gemini is only configured once (unless
+    ``force`` is set) and the report is only re-read if the file changed.
     
     Args:
         api_key (str): Gemini API key
         report_file_path (str): Path to workflow report file
+        force (bool): Reconfigure Gemini and re-read the report unconditionally
     
     Returns:
         dict: Initialization status
     """
-    global _workflow_report, _gemini_model
+    global _workflow_report, _gemini_model, _report_path, _report_stat, _report_hash
     
     try:
         # Configure Gemini API
-        genai.configure(api_key=api_key)
-        _gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+        with _init_lock:
+            if _gemini_model is None or force:
+                genai.configure(api_key=api_key)
+                _gemini_model = genai.GenerativeModel("gemini-2.0-flash")
         
         # Load workflow report
+        _report_path = report_file_path
         try:
-            with open(report_file_path, 'r') as file:
-                _workflow_report = file.read()
+            _load_report(report_file_path, force=force)
             report_loaded = True
-            report_length = len(_workflow_report)
         except FileNotFoundError:
-            _workflow_report = ""
+            with _report_lock:
+                _workflow_report = ""
+                _report_stat = _report_hash = None
+                _build_report_index()
             report_loaded = False
-            report_length = 0
         
         return {
             "status": "success",
             "message": "Chatbot initialized successfully",
             "report_loaded": report_loaded,
-            "report_length": report_length
+            "report_length": len(_workflow_report) if _workflow_report else 0
         }
         
     except Exception as e:
@@ -49,6 +83,52 @@ def initialize_chatbot(api_key=os.getenv("GEMINI_API_KEY"), report_file_path="re
             "message": f"Failed to initialize chatbot: {str(e)}"
         }
 
+def _load_report(report_file_path, force=False):
+    """
+    Loads the report into memory if it changed since the last load.
+
+    A file whose mtime and size are unchanged is not opened at all (unless
+    ``force`` is set); a file that was touched but has the same SHA-256
+    keeps the existing index. Returns True when new content was loaded.
+    """
+    global _workflow_report, _report_stat, _report_hash, _report_checked_at
+
+    stat = os.stat(report_file_path)
+    file_stat = (stat.st_mtime_ns, stat.st_size)
+    with _report_lock:
+        _report_checked_at = time.monotonic()
+        if not force and file_stat == _report_stat:
+            return False
+
+        with open(report_file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        _report_stat = file_stat
+        if content_hash == _report_hash:
+            return False
+
+        _workflow_report = content
+        _report_hash = content_hash
+        _build_report_index()
+        _answer_cache.invalidate()
+        return True
+
+def _refresh_report_if_stale():
+    """Hot-path check: at most one stat() per REPORT_CHECK_INTERVAL_SECONDS."""
+    global _report_checked_at
+    if _report_path is None or time.monotonic() - _report_checked_at < REPORT_CHECK_INTERVAL_SECONDS:
+        return
+    try:
+        if _load_report(_report_path):
+            print(f"🔄 Workflow report changed on disk, reloaded from {_report_path}")
+    except OSError:
+        # Missing or unreadable report: still throttle the next stat()
+        _report_checked_at = time.monotonic()
+
+def get_report_version():
+    """SHA-256 of the report currently loaded (None if no report)."""
+    return _report_hash if _workflow_report else None
+
 def get_chatbot_response(user_question, chat_history=None, include_report_context=True):
     """
     Single function to get chatbot response - Perfect for API calls
@@ -73,20 +153,41 @@ def get_chatbot_response(user_question, chat_history=None, include_report_contex
                 "response": None,
                 "timestamp": datetime.now().isoformat()
             }
+    _refresh_report_if_stale()
     
     try:
+        query_embedding, cache_scope, cached, similarity = _lookup_cached_answer(user_question, chat_history, include_report_context)
+        if cached is not None:
+            return {
+                "status": "success",
+                "message": "Response served from semantic answer cache",
+                "response": cached["response"],
+                "question": user_question,
+                "cached": True,
+                "cached_question": cached["question"],
+                "similarity": round(similarity, 3),
+                "timestamp": datetime.now().isoformat(),
+                "report_context_used": include_report_context and bool(_workflow_report)
+            }
+
         # Generate context-aware prompt
-        prompt = _generate_api_prompt(user_question, chat_history, include_report_context)
+        prompt = _generate_api_prompt(user_question, chat_history, include_report_context, query_embedding)
         
-        # Get response from Gemini
+        # Get response from Gemini (paced by the shared rate limiter)
+        gemini_rate_limiter.acquire(estimate_tokens(prompt))
         response = _gemini_model.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        gemini_rate_limiter.record_usage(getattr(usage, "candidates_token_count", 0))
         
         if response and hasattr(response, 'text'):
+            if cache_scope is not None:
+                _answer_cache.store(query_embedding, {"question": user_question, "response": response.text}, cache_scope)
             return {
                 "status": "success",
                 "message": "Response generated successfully",
                 "response": response.text,
                 "question": user_question,
+                "cached": False,
                 "timestamp": datetime.now().isoformat(),
                 "report_context_used": include_report_context and bool(_workflow_report)
             }
@@ -106,7 +207,166 @@ def get_chatbot_response(user_question, chat_history=None, include_report_contex
             "timestamp": datetime.now().isoformat()
         }
 
-def _generate_api_prompt(user_question, chat_history=None, include_report_context=True):
+def stream_chatbot_response(user_question, chat_history=None, include_report_context=True):
+    """
+    Streaming variant of get_chatbot_response.
+
+    Yields event dicts as Gemini produces output:
+        {"type": "chunk", "text": ...} for every streamed piece of the answer,
+        then one {"type": "done", ...} with the full response and timings
+        (time_to_first_token_ms, total_time_ms), or {"type": "error", ...}.
+    """
+    global _workflow_report, _gemini_model
+
+    if _gemini_model is None:
+        init_result = initialize_chatbot()
+        if init_result["status"] == "error":
+            yield {
+                "type": "error",
+                "message": "Chatbot not initialized",
+                "timestamp": datetime.now().isoformat()
+            }
+            return
+    _refresh_report_if_stale()
+
+    parts = []
+    try:
+        query_embedding, cache_scope, cached, similarity = _lookup_cached_answer(user_question, chat_history, include_report_context)
+        if cached is not None:
+            yield {"type": "chunk", "text": cached["response"]}
+            yield {
+                "type": "done",
+                "status": "success",
+                "response": cached["response"],
+                "question": user_question,
+                "cached": True,
+                "cached_question": cached["question"],
+                "similarity": round(similarity, 3),
+                "time_to_first_token_ms": 0.0,
+                "total_time_ms": 0.0,
+                "timestamp": datetime.now().isoformat(),
+                "report_context_used": include_report_context and bool(_workflow_report)
+            }
+            return
+
+        prompt = _generate_api_prompt(user_question, chat_history, include_report_context, query_embedding)
+
+        gemini_rate_limiter.acquire(estimate_tokens(prompt))
+        start_time = time.time()
+        first_token_time = None
+
+        response = _gemini_model.generate_content(prompt, stream=True)
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token_time is None:
+                first_token_time = time.time()
+            parts.append(text)
+            yield {"type": "chunk", "text": text}
+
+        usage = getattr(response, "usage_metadata", None)
+        gemini_rate_limiter.record_usage(getattr(usage, "candidates_token_count", 0))
+
+        if not parts:
+            # e.g. the prompt or answer was blocked: every chunk came back without text parts
+            yield {
+                "type": "error",
+                "message": "Gemini returned no text for this question",
+                "timestamp": datetime.now().isoformat()
+            }
+            return
+
+        end_time = time.time()
+        ttft_ms = round((first_token_time - start_time) * 1000, 1) if first_token_time else None
+        if cache_scope is not None and parts:
+            _answer_cache.store(query_embedding, {"question": user_question, "response": "".join(parts)}, cache_scope)
+        print(f"⏱️ Chatbot stream: first token after {ttft_ms} ms, completed in {(end_time - start_time) * 1000:.1f} ms")
+
+        yield {
+            "type": "done",
+            "status": "success",
+            "response": "".join(parts),
+            "question": user_question,
+            "cached": False,
+            "time_to_first_token_ms": ttft_ms,
+            "total_time_ms": round((end_time - start_time) * 1000, 1),
+            "timestamp": datetime.now().isoformat(),
+            "report_context_used": include_report_context and bool(_workflow_report)
+        }
+
+    except Exception as e:
+        # Terminal event so the client knows the stream was aborted, with whatever arrived before it
+        yield {
+            "type": "error",
+            "message": f"Error generating response: {str(e)}",
+            "partial_response": "".join(parts),
+            "timestamp": datetime.now().isoformat()
+        }
+
+def _chunk_text(chunk):
+    """Text of a streamed chunk; '' for chunks without parts (safety blocks, finish-only chunks)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+def _build_report_index():
+    """Chunk and embed the loaded report once; questions then only pull the relevant chunks."""
+    global _report_index
+
+    if _report_index is not None and _report_index.report_text == _workflow_report:
+        return
+    _report_index = None
+    if not _workflow_report:
+        return
+    try:
+        _report_index = ReportIndex(_workflow_report)
+    except Exception as e:
+        print(f"⚠️ Could not index workflow report, falling back to full report context: {e}")
+
+def _embed_question(user_question):
+    """Query embedding shared by the answer cache and report retrieval (None on failure)."""
+    try:
+        return get_embedding(user_question, task_type="retrieval_query")
+    except Exception as e:
+        print(f"⚠️ Could not embed question: {e}")
+        return None
+
+def _lookup_cached_answer(user_question, chat_history, include_report_context):
+    """
+    Embeds the question and checks the semantic answer cache.
+
+    Answers that depend on chat history are never cached. Returns
+    ``(query_embedding, cache_scope, cached_entry, similarity)``; cache_scope
+    is None when the answer must not be stored.
+    """
+    query_embedding = _embed_question(user_question)
+    if query_embedding is None or chat_history:
+        return query_embedding, None, None, 0.0
+
+    cache_scope = (get_report_version(), bool(include_report_context))
+    cached, similarity = _answer_cache.lookup(query_embedding, cache_scope)
+    if cached is not None:
+        print(f"⚡ Semantic cache hit (similarity {similarity:.3f}) for: {user_question}")
+    return query_embedding, cache_scope, cached, similarity
+
+def _get_report_context(query_embedding):
+    """Top-k report chunks for the question, or the full report if retrieval is unavailable."""
+    if query_embedding is None or _report_index is None or _report_index.index is None:
+        return _workflow_report
+
+    try:
+        chunks = _report_index.search(query_embedding, top_k=REPORT_TOP_K, token_budget=REPORT_CONTEXT_TOKEN_BUDGET)
+    except Exception as e:
+        print(f"⚠️ Report retrieval failed, using full report context: {e}")
+        return _workflow_report
+
+    if not chunks:
+        return _workflow_report
+    return "\n\n".join(chunk["text"] for chunk in chunks)
+
+def _generate_api_prompt(user_question, chat_history=None, include_report_context=True, query_embedding=None):
     """Generate context-aware prompt for API usage"""
     global _workflow_report
     
@@ -118,7 +378,7 @@ def _generate_api_prompt(user_question, chat_history=None, include_report_contex
     if include_report_context and _workflow_report:
         context_section = f"""
 WORKFLOW REPORT CONTEXT:
-{_workflow_report}
+{_get_report_context(query_embedding)}
 
 Use this workflow report to answer questions about AI agents, costs, implementation strategies, and technical recommendations.
 """
@@ -169,19 +429,21 @@ def chatbot_health_check():
         "gemini_model_ready": _gemini_model is not None,
         "workflow_report_loaded": bool(_workflow_report),
         "report_length": len(_workflow_report) if _workflow_report else 0,
+        "answer_cache": _answer_cache.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
-def reload_workflow_report(report_file_path="workflow_formal_report.txt"):
+def reload_workflow_report(report_file_path=REPORT_FILE_PATH):
     """Reload the workflow report (useful if report file is updated)"""
-    global _workflow_report
+    global _report_path
     
     try:
-        with open(report_file_path, 'r', encoding='utf-8') as file:
-            _workflow_report = file.read()
+        changed = _load_report(report_file_path, force=True)
+        _report_path = report_file_path
         return {
             "status": "success",
             "message": "Workflow report reloaded successfully",
+            "report_changed": changed,
             "report_length": len(_workflow_report)
         }
     except Exception as e:
@@ -1,5 +1,4 @@
 import json
-import sqlite3
 import numpy as np
 import faiss
 import google.generativeai as genai
@@ -9,6 +8,17 @@ import logging
 import agentops
 from agentops.sdk.decorators import session,operation
 import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rate_limiter import gemini_rate_limiter, estimate_tokens
+import embeddings as _embeddings
+from embeddings import EMBEDDING_MODEL
+from pricing import normalize_agent_prices
+from agent_catalog import get_catalog, CATALOG_COLUMNS
+from helper import call_gemini_api, write_file_atomic
+from cost_engine import compute_workflow_costs
+from run_store import run_store, new_run_id, RunCheckpoints
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -37,12 +47,15 @@ def monitored_generate_content(prompt, context="general"):
     start_time = time.time()
     response = None
     try:
+        gemini_rate_limiter.acquire(estimate_tokens(prompt))
         response = chat_model.generate_content(prompt)
         end_time = time.time()
 
         request_size = len(prompt)
         response_size = len(response.text) if hasattr(response, "text") else 0
         latency = end_time - start_time
+        usage = getattr(response, "usage_metadata", None)
+        gemini_rate_limiter.record_usage(getattr(usage, "candidates_token_count", 0))
 
         logging.info(f"Context: {context} | Request Size: {request_size} | Response Size: {response_size} | Latency: {latency:.2f}s")
 
@@ -110,9 +123,67 @@ def analyze_workflow_requirements(workflow_description):
         print("⚠️ Failed to parse workflow analysis JSON")
         return None
 
+# Number of catalog agents retrieved from FAISS and sent to the LLM for ranking
+AGENT_CANDIDATE_TOP_K = int(os.getenv("AGENT_CANDIDATE_TOP_K", "10"))
+_agent_index_cache = {"mtime": None, "index": None, "agent_map": {}}
+
+def _get_agent_index():
+    """Saved agent index, re-read from disk only when build_faiss_index rewrote it."""
+    try:
+        mtime = os.path.getmtime(FAISS_INDEX_PATH)
+    except OSError:
+        return None, {}
+    if _agent_index_cache["mtime"] != mtime:
+        index, agent_map = _load_faiss_index()
+        _agent_index_cache.update(mtime=mtime, index=index, agent_map=agent_map)
+    return _agent_index_cache["index"], _agent_index_cache["agent_map"]
+
+def retrieve_candidate_agents(step_requirements, all_agents, top_k=AGENT_CANDIDATE_TOP_K):
+    """
+    Pre-filters the catalog to the ``top_k`` agents nearest to the step in the FAISS index.
+
+    Falls back to the full catalog when it is already small, the index is
+    missing, or the query cannot be embedded.
+    """
+    if len(all_agents) <= top_k:
+        return all_agents
+
+    index, agent_map = _get_agent_index()
+    if index is None or index.ntotal == 0:
+        print("   ⚠️ Agent index unavailable, sending full catalog to the LLM")
+        return all_agents
+
+    capabilities = step_requirements.get('ai_capabilities_needed', [])
+    if isinstance(capabilities, list):
+        capabilities = ", ".join(str(c) for c in capabilities)
+    query_text = f"{step_requirements.get('description', '')}. Capabilities needed: {capabilities}"
+
+    try:
+        query = np.array([get_embedding(query_text, task_type="retrieval_query")]).astype('float32')
+    except Exception as e:
+        print(f"   ⚠️ Could not embed step for retrieval ({e}), sending full catalog to the LLM")
+        return all_agents
+
+    # Over-fetch a little: the index can still hold agents renamed or removed since it was built
+    _, ids = index.search(query, min(index.ntotal, top_k * 2))
+    agents_by_name = {agent["Name"]: agent for agent in all_agents}
+    candidates = []
+    for agent_id in ids[0]:
+        info = agent_map.get(int(agent_id))
+        agent = agents_by_name.pop(info["name"], None) if info else None
+        if agent is not None:
+            candidates.append(agent)
+        if len(candidates) == top_k:
+            break
+
+    return candidates or all_agents
+
 @operation
 def find_agents_for_workflow_step(step_requirements, all_agents):
     """Find best matching agents for a specific workflow step"""
+    candidates = retrieve_candidate_agents(step_requirements, all_agents)
+    print(f"   🔎 Ranking {len(candidates)} of {len(all_agents)} catalog agents")
+
     prompt = f"""
     You are an AI agent matching specialist. Find the best AI agents from the provided list for the following workflow step.
 
@@ -124,7 +195,7 @@ def find_agents_for_workflow_step(step_requirements, all_agents):
     Priority: {step_requirements['priority']}
 
     Available AI Agents:
-    {json.dumps(all_agents, indent=2)}
+    {json.dumps(candidates, indent=2)}
 
     Analyze each agent and return a JSON array of the top 3 most suitable agents with this structure:
     [
@@ -154,58 +225,13 @@ def find_agents_for_workflow_step(step_requirements, all_agents):
 
 @operation
 def calculate_workflow_costs(workflow_analysis, agent_assignments):
-    """Calculate detailed costs for the entire workflow"""
-    prompt = f"""
-    You are a cost analysis expert for AI workflows. Calculate detailed costs for the following workflow.
+    """Calculate detailed costs for the entire workflow (locally, from normalized catalog prices)"""
+    cost_analysis = compute_workflow_costs(workflow_analysis, agent_assignments)
+    if cost_analysis["unpriced_agents"]:
+        print(f"⚠️ No numeric price for: {', '.join(cost_analysis['unpriced_agents'])}")
+    return cost_analysis
 
-    Workflow Analysis:
-    {json.dumps(workflow_analysis, indent=2)}
-
-    Agent Assignments:
-    {json.dumps(agent_assignments, indent=2)}
-
-    Perform detailed cost calculations and return a JSON object with this structure:
-    {{
-        "total_monthly_cost": "number",
-        "cost_breakdown": [
-            {{
-                "step_name": "string",
-                "agents_used": ["list of agent names"],
-                "input_costs": "number",
-                "output_costs": "number",
-                "step_total": "number",
-                "volume_assumptions": "string explaining calculations"
-            }}
-        ],
-        "cost_per_operation": "number",
-        "budget_analysis": {{
-            "budget_available": "number from workflow",
-            "budget_utilization": "percentage",
-            "cost_optimization_suggestions": ["list of suggestions"]
-        }},
-        "scaling_projections": {{
-            "at_2x_volume": "number",
-            "at_5x_volume": "number",
-            "at_10x_volume": "number"
-        }}
-    }}
-
-    Be specific with your calculations. Show your work for volume-based pricing.
-    Extract pricing information from the agent data (InputPrice, OutputPrice fields).
-    Consider that pricing might be in various formats (per token, per request, per minute, etc.).
-    """
-    
-    response = monitored_generate_content(prompt, context="cost_calculation")
-    if not response:
-        return None
-    
-    try:
-        json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except json.JSONDecodeError:
-        print("⚠️ Failed to parse cost calculation JSON")
-        return None
+IMPLEMENTATION_PLAN_FAILED = "Implementation plan generation failed."
 
 @operation
 def generate_workflow_implementation_plan(workflow_analysis, agent_assignments, cost_analysis):
@@ -229,59 +255,47 @@ def generate_workflow_implementation_plan(workflow_analysis, agent_assignments,
     """
     
     response = monitored_generate_content(prompt, context="implementation_planning")
-    return response.text if response else "Implementation plan generation failed."
+    return response.text if response else IMPLEMENTATION_PLAN_FAILED
 
 # -----------------------------
 # Main Workflow Processing Function
 # -----------------------------
 @operation
-def process_complex_workflow(workflow_description):
-    """Process a complex workflow description and return complete solution"""
+def process_complex_workflow(workflow_description, run_id=None, resume=False):
+    """Process a complex workflow description and return complete solution
+
+    The Gemini-backed stages (analysis, per-step agent matching, plan) are
+    checkpointed under ``run_id``; ``resume=True`` skips the ones that
+    already completed for that run.
+    """
+    checkpoints = RunCheckpoints(run_store, run_id or new_run_id(), resume=resume, namespace="rag")
     
     print("🔍 Step 1: Analyzing workflow requirements...")
-    workflow_analysis = analyze_workflow_requirements(workflow_description)
+    workflow_analysis = checkpoints.run("analysis", lambda: analyze_workflow_requirements(workflow_description), is_complete=bool)
     if not workflow_analysis:
         print("❌ Failed to analyze workflow requirements")
         return None
     
     print("📊 Step 2: Loading available agents from database...")
-    conn = sqlite3.connect('agents.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM agents")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    all_agents = []
-    for row in rows:
-        agent_info = {
-            "Name": row[0],
-            "Provider": row[1],
-            "UseCase": row[2],
-            "Category": row[3],
-            "InputPrice": row[4],
-            "OutputPrice": row[5],
-            "Integration": row[6],
-            "FreeTier": row[7],
-            "Latency": row[8],
-            "Website": row[9],
-            "Alternatives": row[10]
-        }
-        all_agents.append(agent_info)
+    all_agents = get_catalog().all_agents()
     
     print("🎯 Step 3: Matching agents to workflow steps...")
     agent_assignments = {}
     for step in workflow_analysis.get('key_steps', []):
         print(f"   Processing step: {step['step_name']}")
-        matched_agents = find_agents_for_workflow_step(step, all_agents)
+        matched_agents = checkpoints.run(
+            f"agents:{step['step_name']}", lambda: find_agents_for_workflow_step(step, all_agents), is_complete=bool
+        ) or []
         agent_assignments[step['step_name']] = matched_agents
-        time.sleep(1)  # Rate limiting
     
     print("💰 Step 4: Calculating costs...")
     cost_analysis = calculate_workflow_costs(workflow_analysis, agent_assignments)
     
     print("📋 Step 5: Generating implementation plan...")
-    implementation_plan = generate_workflow_implementation_plan(
-        workflow_analysis, agent_assignments, cost_analysis
+    implementation_plan = checkpoints.run(
+        "implementation_plan",
+        lambda: generate_workflow_implementation_plan(workflow_analysis, agent_assignments, cost_analysis),
+        is_complete=lambda plan: plan != IMPLEMENTATION_PLAN_FAILED
     )
     
     return {
@@ -294,127 +308,203 @@ def process_complex_workflow(workflow_description):
 # -----------------------------
 # Original Functions (Restored)
 # -----------------------------
+# Agents packed into one enrichment prompt, and enrichment prompts in flight at once
+ENRICHMENT_AGENTS_PER_PROMPT = int(os.getenv("ENRICHMENT_AGENTS_PER_PROMPT", "5"))
+ENRICHMENT_MAX_WORKERS = int(os.getenv("ENRICHMENT_MAX_WORKERS", "4"))
+
+ENRICHMENT_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {column: {"type": "STRING"} for column in CATALOG_COLUMNS},
+        "required": list(CATALOG_COLUMNS)
+    }
+}
+
 @operation
-def enrich_agent_data(agent):
+def enrich_agent_batch(agents):
+    """
+    Enriches several catalog agents with one structured Gemini call.
+
+    Returns ``{lower-cased name: enriched dict}`` for the agents found in the
+    response; agents missing from it are left out (and stay unenriched).
+    Fields the model leaves empty keep their original value.
+    """
     prompt = f"""
 You are an AI product expert.
 
-Take the following basic AI tool data and enhance each field with more clarity and detail. Make sure to elaborate the 'Use Case' by listing specific tasks. Also, make each field useful for cost estimation and quality assessment.
-
-Example data:
-Name: {agent['Name']}
-Provider: {agent['Provider']}
-Use Case: {agent['UseCase']}
-Category: {agent['Category']}
-Input Price: {agent['InputPrice']}
-Output Price: {agent['OutputPrice']}
-Integration: {agent['Integration']}
-Free Tier: {agent['FreeTier']}
-Latency: {agent['Latency']}
-Website: {agent['Website']}
-Alternatives: {agent['Alternatives']}
-This is a JSON object with keys:
-Name, Provider, UseCase, Category, InputPrice, OutputPrice, Integration, FreeTier, Latency, Website, Alternatives.
-Return updated fields in JSON format with the same keys.
-No need to give anything else other than the JSON object.
-"""
-
-    response = monitored_generate_content(prompt, context="data_enrichment")
-    if not response:
-        return agent  # fallback
+Take the following basic AI tool data and enhance each field with more clarity and detail. Make sure to elaborate the 'UseCase' by listing specific tasks. Also, make each field useful for cost estimation and quality assessment.
 
-    print(f"\n📨 Gemini raw response:\n{response.text}")
+Agents:
+{json.dumps(agents, indent=2)}
 
-    pattern = r'"?(Name|Provider|UseCase|Category|InputPrice|OutputPrice|Integration|FreeTier|Latency|Website|Alternatives)"?\s*:\s*[""]?(.+?)[""]?(?:,|\n|$)'
-    matches = re.findall(pattern, response.text, re.DOTALL)
-
-    enriched = {key: agent.get(key, "") for key in agent}
-    for key, value in matches:
-        enriched[key.strip()] = value.strip().rstrip(',')
+Return one JSON object per agent with the same keys:
+{', '.join(CATALOG_COLUMNS)}.
+Keep each agent's Name exactly as given.
+"""
 
+    result = call_gemini_api(prompt, schema=ENRICHMENT_SCHEMA, instruction_type=f"data enrichment of {len(agents)} agents")
+    if not result:
+        return {}
+
+    originals = {agent["Name"].strip().lower(): agent for agent in agents}
+    enriched = {}
+    for item in result:
+        key = str(item.get("Name", "")).strip().lower()
+        original = originals.get(key)
+        if original is None:
+            continue
+        enriched[key] = {
+            column: str(item.get(column) or "").strip() or original.get(column)
+            for column in CATALOG_COLUMNS
+        }
+        enriched[key]["Name"] = original["Name"]  # Name is the catalog key, so it is kept as is
     return enriched
 
+def enrich_agent_data(agent):
+    """Single-agent form of enrich_agent_batch; returns the agent unchanged if enrichment failed."""
+    return enrich_agent_batch([agent]).get(agent["Name"].strip().lower(), agent)
+
 @operation
-def enrich_all_agents():
-    conn = sqlite3.connect('agents.db')
-    cursor = conn.cursor()
+def enrich_all_agents(agents_per_prompt=ENRICHMENT_AGENTS_PER_PROMPT, max_workers=ENRICHMENT_MAX_WORKERS):
+    """
+    Enriches every agent not enriched yet.
 
-    try:
-        cursor.execute("ALTER TABLE agents ADD COLUMN Enriched BOOLEAN DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
-
-    cursor.execute("SELECT * FROM agents WHERE Enriched = 0")
-    rows = cursor.fetchall()
-    enriched_rows = []
-    for row in rows:
-        agent = {
-            "Name": row[0],
-            "Provider": row[1],
-            "UseCase": row[2],
-            "Category": row[3],
-            "InputPrice": row[4],
-            "OutputPrice": row[5],
-            "Integration": row[6],
-            "FreeTier": row[7],
-            "Latency": row[8],
-            "Website": row[9],
-            "Alternatives": row[10]
+    Agents are packed ``agents_per_prompt`` to a prompt and up to
+    ``max_workers`` prompts run at once (still bounded by the Gemini rate
+    limiter). Each batch is committed as soon as it completes, so a crash
+    keeps everything enriched so far and the next run only retries the rest.
+    """
+    catalog = get_catalog()
+    pending = catalog.agents_to_enrich()
+    if not pending:
+        print("✅ All agents are already enriched.")
+        return True
+
+    batches = [pending[i:i + agents_per_prompt] for i in range(0, len(pending), max(1, agents_per_prompt))]
+    print(f"📥 Enriching {len(pending)} agents in {len(batches)} batches...")
+
+    enriched_count = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(enrich_agent_batch, [agent for _, agent in batch]): batch
+            for batch in batches
         }
-
-        enriched = enrich_agent_data(agent)
-        enriched_rows.append(tuple([
-            enriched["Name"], enriched["Provider"], enriched["UseCase"], enriched["Category"],
-            enriched["InputPrice"], enriched["OutputPrice"], enriched["Integration"],
-            enriched["FreeTier"], enriched["Latency"], enriched["Website"], enriched["Alternatives"], 1
-        ]))
-
-    cursor.executemany('''
-        INSERT OR REPLACE INTO agents 
-        (Name, Provider, UseCase, Category, InputPrice, OutputPrice, Integration, FreeTier, Latency, Website, Alternatives, Enriched)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', enriched_rows)
-
-    conn.commit()
-    conn.close()
-    print("✅ Enriched only new agents and marked them in the DB.")
-    return True
-
-@operation
-def get_embedding(text):
-    response = genai.embed_content(
-        model="models/embedding-001",
-        content=text,
-        task_type="retrieval_document"
-    )
-    return response["embedding"]
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                enriched = future.result()
+            except Exception as e:
+                print(f"⚠️ Enrichment batch failed ({e}); its agents will be retried next run")
+                continue
+
+            rows = []
+            for agent_id, agent in batch:
+                result = enriched.get(agent["Name"].strip().lower())
+                if result is not None:
+                    rows.append(tuple(result[column] for column in CATALOG_COLUMNS[1:]) + (agent_id,))
+            if not rows:
+                continue
+
+            assignments = ", ".join(f"{column} = ?" for column in CATALOG_COLUMNS[1:])
+            with catalog.transaction() as conn:
+                conn.executemany(
+                    f"UPDATE agents SET {assignments}, Enriched = 1, InputPriceUnit = NULL WHERE id = ?",
+                    rows
+                )
+            enriched_count += len(rows)
+            print(f"   ✅ Committed {len(rows)} enriched agents ({enriched_count}/{len(pending)})")
+
+    print(f"✅ Enriched {enriched_count} of {len(pending)} new agents and marked them in the DB.")
+    return enriched_count == len(pending)
+
+FAISS_INDEX_PATH = "data/agents_faiss.index"
+FAISS_INDEX_MAP_PATH = "data/index_map.json"
+# Held while a run enriches the catalog and rebuilds the index
+_catalog_maintenance_lock = threading.Lock()
+
+# Traced wrappers around the shared embedding helpers
+get_embedding = operation(_embeddings.get_embedding)
+get_embeddings = operation(_embeddings.get_embeddings)
+
+def _agent_embedding_text(use_case, category):
+    return f"{use_case}. Category: {category}"
+
+def _load_faiss_index():
+    """
+    Returns the saved (index, agent_map) pair, or (None, {}) if there is none
+    or it predates the ID-mapped format ({id: {"name", "text_hash"}}).
+    """
+    if not (os.path.exists(FAISS_INDEX_PATH) and os.path.exists(FAISS_INDEX_MAP_PATH)):
+        return None, {}
+    try:
+        index = faiss.read_index(FAISS_INDEX_PATH)
+        with open(FAISS_INDEX_MAP_PATH) as f:
+            agent_map = json.load(f)
+    except (RuntimeError, json.JSONDecodeError):
+        return None, {}
+    if not isinstance(index, faiss.IndexIDMap2) or not all(isinstance(v, dict) for v in agent_map.values()):
+        return None, {}
+    return index, {int(k): v for k, v in agent_map.items()}
 
 @operation
 def build_faiss_index():
-    conn = sqlite3.connect('data/agents.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT Name, UseCase, Category FROM agents")
-    rows = cursor.fetchall()
-    conn.close()
-
-    embeddings = []
-    agent_map = {}
-
-    for i, (name, use_case, category) in enumerate(rows):
-        combined_text = f"{use_case}. Category: {category}"
-        embedding = get_embedding(combined_text)
-        embeddings.append(embedding)
-        agent_map[i] = name
-
-    vectors = np.array(embeddings).astype('float32')
-    index = faiss.IndexFlatL2(len(vectors[0]))
-    index.add(vectors)
+    """
+    Brings the agent FAISS index up to date with the catalog.
 
-    faiss.write_index(index, "data/agents_faiss.index")
-    with open("data/index_map.json", "w") as f:
-        json.dump(agent_map, f)
+    Vectors are keyed by the agent's catalog id through an IndexIDMap2. Only
+    agents that are new or whose embedded text changed are embedded again,
+    and rows that left the catalog are removed in place.
+    """
+    records = get_catalog().records()
+    index, agent_map = _load_faiss_index()
+
+    current = {}
+    for record in records:
+        text = _agent_embedding_text(record.UseCase, record.Category)
+        current[record.id] = {
+            "name": record.Name,
+            "text": text,
+            "text_hash": hashlib.sha256(f"{EMBEDDING_MODEL}\n{text}".encode("utf-8")).hexdigest()
+        }
 
-    print("✅ FAISS index built and saved.")
+    removed = [agent_id for agent_id in agent_map if agent_id not in current]
+    changed = [agent_id for agent_id, info in current.items()
+               if agent_id in agent_map and agent_map[agent_id]["text_hash"] != info["text_hash"]]
+    added = [agent_id for agent_id in current if agent_id not in agent_map]
+
+    if index is not None and (removed or changed):
+        index.remove_ids(np.array(removed + changed, dtype='int64'))
+    for agent_id in removed:
+        del agent_map[agent_id]
+
+    to_embed = changed + added
+    if to_embed:
+        embeddings = get_embeddings([current[agent_id]["text"] for agent_id in to_embed])
+        vectors = np.array(embeddings).astype('float32')
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+        index.add_with_ids(vectors, np.array(to_embed, dtype='int64'))
+        for agent_id in to_embed:
+            agent_map[agent_id] = {"name": current[agent_id]["name"], "text_hash": current[agent_id]["text_hash"]}
+
+    # Renames don't change the embedded text, but candidates are resolved by name
+    renamed = [agent_id for agent_id, info in agent_map.items() if info["name"] != current[agent_id]["name"]]
+    for agent_id in renamed:
+        agent_map[agent_id]["name"] = current[agent_id]["name"]
+
+    if index is None:
+        print("⚠️ No agents to index.")
+        return
+
+    # Map first, then index: readers reload when the index file's mtime changes
+    write_file_atomic(FAISS_INDEX_MAP_PATH, json.dumps({str(k): v for k, v in agent_map.items()}))
+    tmp_index_path = f"{FAISS_INDEX_PATH}.{os.getpid()}.tmp"
+    faiss.write_index(index, tmp_index_path)
+    os.replace(tmp_index_path, FAISS_INDEX_PATH)
+
+    unchanged = len(current) - len(to_embed)
+    print(f"✅ FAISS index updated: {len(added)} added, {len(changed)} re-embedded, {len(removed)} removed, {len(renamed)} renamed, {unchanged} unchanged.")
 
 # -----------------------------
 # Output Generation Functions
@@ -561,12 +651,23 @@ Make the output professional and easy to read when the script is executed.
 # Enhanced Main Execution
 # -----------------------------
 @session
-def main1():
+def main1(run_id=None, resume=False, summaries=None):
+    """
+    Runs the RAG pipeline on a workflow run's task summaries.
+
+    ``summaries`` are the JSON summaries returned by ``main.main``. Pass them
+    straight through when both run in one process so concurrent runs never
+    read each other's output; without them the latest combined summary file
+    is used. Catalog enrichment and FAISS index maintenance are serialized.
+    """
     # -----------------------------
     # Complex Workflow Input Examples
     # -----------------------------
-    with open('summaries/industrial_workflow_summary.json') as f:
-        data = json.load(f)
+    if summaries is None:
+        with open('summaries/industrial_workflow_summary.json') as f:
+            data = json.load(f)
+    else:
+        data = [json.loads(s) if isinstance(s, str) else s for s in summaries]
     COMPLEX_WORKFLOW_EXAMPLES = {
         "content_creation_pipeline": data,
         
@@ -577,13 +678,18 @@ def main1():
     print("🚀 AI Workflow Solution Generator")
     print("=" * 50)
     
-    # Step 1: Enrich agent data
-    print("📥 Step 1: Enriching agent data from Gemini...")
-    enrich_all_agents()
-    
-    # Step 2: Build FAISS index
-    print("📊 Step 2: Building FAISS index...")
-    build_faiss_index()
+    # One run at a time updates the shared catalog and index
+    with _catalog_maintenance_lock:
+        # Step 1: Enrich agent data
+        print("📥 Step 1: Enriching agent data from Gemini...")
+        enrich_all_agents()
+
+        # Parse free-text prices into numeric columns for the local cost engine
+        normalize_agent_prices()
+
+        # Step 2: Build FAISS index
+        print("📊 Step 2: Building FAISS index...")
+        build_faiss_index()
     
     # Step 3: Choose and process workflow
     workflow_type = "content_creation_pipeline"  # Change this to test different workflows
@@ -593,7 +699,7 @@ def main1():
     print(f"📄 Workflow description length: {len(workflow_description)} characters")
     
     # Process the workflow
-    result = process_complex_workflow(workflow_description)
+    result = process_complex_workflow(workflow_description, run_id=run_id, resume=resume)
     
     if result:
         print("\n" + "="*50)
@@ -638,12 +744,13 @@ def main1():
             'python_output_code': python_output
         }
         
-        # Save to files
-        with open('data/workflow_solution_complete.json', 'w') as f:
-            json.dump(outputs, f, indent=2)
-        
-        with open('reports/workflow_formal_report.txt', 'w') as f:
-            f.write(formal_report)
+        # Save to files: a copy per run, and the latest report the chatbot reads (replaced atomically)
+        outputs_json = json.dumps(outputs, indent=2)
+        write_file_atomic('data/workflow_solution_complete.json', outputs_json)
+        write_file_atomic('reports/workflow_formal_report.txt', formal_report)
+        if run_id:
+            write_file_atomic(f'data/workflow_solution_complete_{run_id}.json', outputs_json)
+            write_file_atomic(f'reports/workflow_formal_report_{run_id}.txt', formal_report)
         
         
         print("\n💾 OUTPUTS SAVED:")
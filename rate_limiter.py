@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+load_dotenv()
+
+# Quota for gemini-2.0-flash; override to match your project's tier
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (~4 characters per token)."""
+    return max(1, len(text or "") // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    Callers reserve what they need up front; the balance may go negative,
+    which queues later callers behind earlier ones instead of letting them
+    race for the same refill.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.capacity = float(capacity or rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount):
+        """Takes ``amount`` from the bucket and returns the seconds to wait before using it."""
+        with self.lock:
+            self._refill()
+            self.tokens -= min(float(amount), self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def consume(self, amount):
+        """Charges ``amount`` after the fact (e.g. output tokens) without waiting."""
+        with self.lock:
+            self._refill()
+            self.tokens -= float(amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by every Gemini call."""
+
+    def __init__(self, requests_per_minute=GEMINI_RPM, tokens_per_minute=GEMINI_TPM):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens=1):
+        """Blocks only if the request or token budget is exhausted. Returns the time waited."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_usage(self, extra_tokens):
+        """Charges tokens that were only known once the response arrived."""
+        if extra_tokens and extra_tokens > 0:
+            self.tokens.consume(extra_tokens)
+
+
+# Process-wide limiter: helper, rag_implementation and qanda all pace through this
+gemini_rate_limiter = RateLimiter()
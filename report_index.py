@@ -0,0 +1,104 @@
+import re
+import numpy as np
+import faiss
+from embeddings import get_embeddings
+from rate_limiter import estimate_tokens
+
+CHUNK_MAX_CHARS = 1500
+
+# Markdown headings, bold-only lines and "1. EXECUTIVE SUMMARY" style titles
+_HEADING_PATTERN = re.compile(
+    r'^\s*(#{1,6}\s+.+|\*\*[^*]+\*\*:?|\d+(\.\d+)*\.?\s+[A-Z][A-Z0-9 &/,()\-]+:?)\s*$'
+)
+
+
+def _split_long_section(title, body, max_chars):
+    """Splits a section body on paragraph boundaries into pieces of at most ``max_chars``."""
+    pieces, current = [], ""
+    for paragraph in re.split(r'\n\s*\n', body):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = ""
+        # A single oversized paragraph is hard-wrapped
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return [{"section": title, "text": f"{title}\n{piece}" if title else piece} for piece in pieces]
+
+
+def chunk_report(report_text, max_chars=CHUNK_MAX_CHARS):
+    """
+    Splits a report into section-aware chunks.
+
+    Each chunk stays inside one section and repeats that section's heading,
+    so a retrieved chunk still says which part of the report it came from.
+    """
+    sections, title, lines = [], "", []
+    for line in report_text.splitlines():
+        if _HEADING_PATTERN.match(line):
+            if any(l.strip() for l in lines):
+                sections.append((title, "\n".join(lines)))
+            title, lines = line.strip(), []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines)))
+
+    chunks = []
+    for section_title, body in sections:
+        # Leave room for the heading that is repeated at the top of every chunk
+        chunks.extend(_split_long_section(section_title, body, max(200, max_chars - len(section_title) - 1)))
+    for i, chunk in enumerate(chunks):
+        chunk["position"] = i
+    return chunks
+
+
+class ReportIndex:
+    """FAISS inner-product index over normalized report-chunk embeddings (cosine similarity)."""
+
+    def __init__(self, report_text, max_chars=CHUNK_MAX_CHARS):
+        self.report_text = report_text
+        self.chunks = chunk_report(report_text, max_chars=max_chars)
+        self.index = None
+        if not self.chunks:
+            return
+
+        embeddings = get_embeddings([chunk["text"] for chunk in self.chunks])
+        vectors = np.array(embeddings).astype('float32')
+        faiss.normalize_L2(vectors)
+        self.index = faiss.IndexFlatIP(vectors.shape[1])
+        self.index.add(vectors)
+        print(f"✅ Report index built: {len(self.chunks)} chunks")
+
+    def search(self, query_embedding, top_k=5, token_budget=2000):
+        """
+        Returns the most relevant chunks for ``query_embedding``.
+
+        At most ``top_k`` chunks are taken, best first, while their combined
+        size stays within ``token_budget``; the result is put back in report
+        order so the prompt reads naturally.
+        """
+        if self.index is None:
+            return []
+
+        query = np.array([query_embedding]).astype('float32')
+        faiss.normalize_L2(query)
+        _, ids = self.index.search(query, min(top_k, len(self.chunks)))
+
+        selected, used_tokens = [], 0
+        for chunk_id in ids[0]:
+            if chunk_id < 0:
+                continue
+            chunk = self.chunks[chunk_id]
+            chunk_tokens = estimate_tokens(chunk["text"])
+            if selected and used_tokens + chunk_tokens > token_budget:
+                break
+            selected.append(chunk)
+            used_tokens += chunk_tokens
+        return sorted(selected, key=lambda c: c["position"])
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from cachetools import LRUCache, TTLCache
+from sqlite_util import thread_local_connection
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_DB_PATH = os.getenv("GEMINI_CACHE_PATH", "data/gemini_cache.db")
+CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "5000"))
+
+
+def make_cache_key(*parts):
+    """Content-addressed key: SHA-256 of the JSON-serialized parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with TTL and size-bounded LRU eviction.
+
+    The database runs in WAL mode with a busy timeout, so several processes
+    (CLI runs, server workers) can share one cache file. A small in-memory
+    cache sits in front of it. Values must be JSON-serializable; every get
+    returns a fresh copy, so callers may mutate what they receive.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, table="responses", ttl_seconds=CACHE_TTL_SECONDS,
+                 max_entries=CACHE_MAX_ENTRIES, memory_size=256):
+        self.db_path = db_path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._estimated_entries = None  # upper bound on stored rows; None until first counted
+        if ttl_seconds:
+            self._memory = TTLCache(maxsize=memory_size, ttl=ttl_seconds)
+        else:
+            self._memory = LRUCache(maxsize=memory_size)
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._connect()
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_access ON {table}(last_access)")
+        conn.commit()
+
+    def _connect(self):
+        return thread_local_connection(self.db_path)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """Returns the cached value for ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            raw = self._memory.get(key)
+        if raw is not None:
+            self._count(True)
+            return json.loads(raw)
+
+        conn = self._connect()
+        row = conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+            if row is not None:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+            self._count(False)
+            return default
+
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        with self._lock:
+            self._memory[key] = row[0]
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Stores ``value`` and evicts the least recently used entries beyond ``max_entries``."""
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """
+        Stores ``(key, value)`` pairs in one transaction, then evicts the
+        least recently used entries beyond ``max_entries`` once for the batch.
+        """
+        now = time.time()
+        rows = [(key, json.dumps(value, default=str), now, now) for key, value in items]
+        if not rows:
+            return
+        conn = self._connect()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        if self.max_entries:
+            self._evict_excess(conn, len(rows))
+        conn.commit()
+        with self._lock:
+            for key, raw, _, _ in rows:
+                self._memory[key] = raw
+
+    def _evict_excess(self, conn, inserted):
+        """
+        Deletes the oldest entries beyond ``max_entries``. The table is only
+        counted when the running estimate (which over-counts replaced keys)
+        says it may be over the limit, so most writes skip eviction entirely.
+        """
+        with self._lock:
+            if self._estimated_entries is not None:
+                self._estimated_entries += inserted
+                if self._estimated_entries <= self.max_entries:
+                    return
+
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(f'''
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?
+                )
+            ''', (count - self.max_entries,))
+        with self._lock:
+            self._estimated_entries = min(count, self.max_entries)
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+        with self._lock:
+            self._memory.clear()
+            self._estimated_entries = None
+
+    def stats(self):
+        """Hit/miss counters for this process plus the number of stored entries."""
+        entries = self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": entries
+            }
+
+
+# Shared cache for helper.call_gemini_api responses
+gemini_response_cache = PersistentCache()
@@ -0,0 +1,180 @@
+import os
+import numpy as np
+
+# Task fields the ROI calculation reads (roi_inputs + step 6 LLM estimates)
+ROI_INPUT_FIELDS = (
+    "tasks_per_month",
+    "current_time_per_task_minutes",
+    "people_involved_count",
+    "avg_hourly_cost_per_employee",
+    "estimated_time_saved_percent",
+    "estimated_investment_cost",
+)
+
+
+# Monte Carlo settings; ROI_SIMULATION_DRAWS=0 turns the simulation off
+SIMULATION_DRAWS = int(os.getenv("ROI_SIMULATION_DRAWS", "100000"))
+
+# Default spreads around the point estimates; override per task with an
+# "roi_uncertainty" dict in roi_inputs using the same keys
+DEFAULT_ROI_UNCERTAINTY = {
+    "tasks_per_month": 0.2,                # +/- 20% triangular around the stated volume
+    "avg_hourly_cost_per_employee": 0.1,   # +/- 10% triangular around the stated rate
+    "time_saved_low": 0.5,                 # LLM time-saved estimate can be half as good...
+    "time_saved_high": 1.2,                # ...or 20% better (capped at 100%)
+    "investment_sigma": 0.35,              # lognormal spread, median = LLM investment estimate
+}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def compute_roi_metrics(tasks_per_month, minutes_per_task, people_involved, hourly_cost,
+                        time_saved_percent, investment_cost):
+    """
+    Vectorized step 6 ROI math. Every argument is a scalar or an array of
+    equal length (one entry per task); all metrics come back as arrays.
+
+    Payback and annual ROI are NaN where they are undefined (no saving or no
+    investment).
+    """
+    volume = np.asarray(tasks_per_month, dtype=float)
+    minutes = np.asarray(minutes_per_task, dtype=float)
+    people = np.asarray(people_involved, dtype=float)
+    hourly = np.asarray(hourly_cost, dtype=float)
+    saved_pct = np.asarray(time_saved_percent, dtype=float)
+    investment = np.asarray(investment_cost, dtype=float)
+
+    time_saved_per_task = minutes * people * (saved_pct / 100)
+    hours_saved_per_month = (time_saved_per_task * volume) / 60
+    cost_saving_per_month = hours_saved_per_month * hourly
+
+    valid = (cost_saving_per_month > 0) & (investment > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payback_months = np.where(valid, investment / cost_saving_per_month, np.nan)
+        annual_roi_percent = np.where(investment > 0, (cost_saving_per_month * 12 - investment) / investment * 100, np.nan)
+
+    return {
+        "time_saved_per_task_minutes": time_saved_per_task,
+        "hours_saved_per_month": hours_saved_per_month,
+        "cost_saving_per_month": cost_saving_per_month,
+        "payback_months": payback_months,
+        "annual_roi_percent": annual_roi_percent,
+    }
+
+
+def roi_metrics_for_tasks(tasks):
+    """Runs compute_roi_metrics over a list of task dicts in one pass."""
+    columns = [np.array([_to_float(task.get(field)) for task in tasks], dtype=float) for field in ROI_INPUT_FIELDS]
+    return compute_roi_metrics(*columns)
+
+
+def apply_roi_metrics(task):
+    """Writes the step 6 ``calculated_*`` fields and payback period onto a single task."""
+    metrics = roi_metrics_for_tasks([task])
+    task['calculated_time_saved_per_task_minutes'] = round(float(metrics["time_saved_per_task_minutes"][0]), 2)
+    task['calculated_total_time_saved_per_month_hours'] = round(float(metrics["hours_saved_per_month"][0]), 2)
+    task['calculated_potential_cost_saving_per_month'] = round(float(metrics["cost_saving_per_month"][0]), 2)
+
+    payback = metrics["payback_months"][0]
+    task['estimated_payback_period_months'] = round(float(payback), 1) if np.isfinite(payback) else "N/A"
+    return task
+
+
+def build_roi_portfolio(tasks):
+    """
+    Ranks tasks by payback period (shortest first) from one vectorized pass.
+
+    Tasks without a defined payback are listed last, ordered by monthly
+    saving. Returns a list of plain dicts ready for JSON.
+    """
+    if not tasks:
+        return []
+
+    metrics = roi_metrics_for_tasks(tasks)
+    payback = metrics["payback_months"]
+    saving = np.nan_to_num(metrics["cost_saving_per_month"])
+    # lexsort uses the last key as primary: payback (NaN -> inf), then larger saving first
+    order = np.lexsort((-saving, np.where(np.isfinite(payback), payback, np.inf)))
+
+    def _clean(value, digits):
+        return round(float(value), digits) if np.isfinite(value) else None
+
+    portfolio = []
+    for rank, i in enumerate(order, 1):
+        task = tasks[i]
+        portfolio.append({
+            "rank": rank,
+            "task_name": task.get("task_name"),
+            "team": task.get("team"),
+            "monthly_cost_saving": _clean(metrics["cost_saving_per_month"][i], 2),
+            "hours_saved_per_month": _clean(metrics["hours_saved_per_month"][i], 2),
+            "investment_cost": _clean(_to_float(task.get("estimated_investment_cost")), 2),
+            "payback_months": _clean(payback[i], 1),
+            "annual_roi_percent": _clean(metrics["annual_roi_percent"][i], 1),
+        })
+    return portfolio
+
+
+def _triangular_around(rng, center, low_factor, high_factor, size):
+    center = max(center, 0.0)
+    # Spreads above 100% would otherwise draw negative volumes and wages
+    low, high = max(center * low_factor, 0.0), center * high_factor
+    if high <= low:
+        return np.full(size, center)
+    return rng.triangular(low, min(max(center, low), high), high, size)
+
+
+def _percentiles(values):
+    with np.errstate(invalid='ignore'):
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+
+    def _clean(value):
+        return round(float(value), 2) if np.isfinite(value) else None
+    return {"p10": _clean(p10), "p50": _clean(p50), "p90": _clean(p90)}
+
+
+def simulate_roi(task, n_draws=SIMULATION_DRAWS, seed=None):
+    """
+    Monte Carlo version of the step 6 ROI estimate for one task.
+
+    Volume and hourly cost are drawn from triangular distributions around
+    roi_inputs, time saved from a triangular around the LLM estimate, and
+    investment from a lognormal whose median is the LLM estimate. All draws
+    go through compute_roi_metrics in one vectorized pass. Returns P10/P50/P90
+    of monthly saving and payback (None = no payback in that percentile).
+    """
+    values = [_to_float(task.get(field)) for field in ROI_INPUT_FIELDS]
+    if n_draws <= 0 or not all(np.isfinite(values)):
+        return None
+    volume, minutes, people, hourly, saved_pct, investment = values
+
+    spread = dict(DEFAULT_ROI_UNCERTAINTY)
+    spread.update(task.get("roi_uncertainty") or {})
+    rng = np.random.default_rng(seed)
+
+    volume_draws = _triangular_around(rng, volume, 1 - spread["tasks_per_month"], 1 + spread["tasks_per_month"], n_draws)
+    hourly_draws = _triangular_around(
+        rng, hourly, 1 - spread["avg_hourly_cost_per_employee"], 1 + spread["avg_hourly_cost_per_employee"], n_draws
+    )
+    saved_draws = np.minimum(
+        _triangular_around(rng, saved_pct, spread["time_saved_low"], spread["time_saved_high"], n_draws), 100.0
+    )
+    if investment > 0:
+        investment_draws = rng.lognormal(np.log(investment), spread["investment_sigma"], n_draws)
+    else:
+        investment_draws = np.zeros(n_draws)
+
+    metrics = compute_roi_metrics(volume_draws, minutes, people, hourly_draws, saved_draws, investment_draws)
+    payback = np.where(np.isnan(metrics["payback_months"]), np.inf, metrics["payback_months"])
+
+    return {
+        "draws": n_draws,
+        "monthly_cost_saving": _percentiles(metrics["cost_saving_per_month"]),
+        "payback_months": _percentiles(payback),
+        "probability_payback_within_12_months": round(float(np.mean(payback <= 12)), 3),
+    }
@@ -0,0 +1,188 @@
+import copy
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from sqlite_util import thread_local_connection
+from dotenv import load_dotenv
+load_dotenv()
+
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", "data/run_store.db")
+
+
+def new_run_id():
+    return uuid.uuid4().hex
+
+
+class RunStore:
+    """
+    SQLite store of workflow runs.
+
+    A run keeps its business context, the inputs it was started with and
+    every analyzed task (with all LLM outputs), so later requests can
+    recompute derived numbers without calling Gemini again. While a run is
+    in progress each finished stage is checkpointed, so a failed run can be
+    resumed from the first incomplete stage.
+    """
+
+    def __init__(self, db_path=RUN_STORE_PATH):
+        self.db_path = db_path
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                business_context TEXT,
+                inputs TEXT
+            );
+            CREATE TABLE IF NOT EXISTS run_tasks (
+                run_id TEXT NOT NULL,
+                task_number INTEGER NOT NULL,
+                task TEXT NOT NULL,
+                PRIMARY KEY (run_id, task_number)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, stage)
+            );
+        ''')
+        try:
+            conn.execute("ALTER TABLE runs ADD COLUMN status TEXT")
+        except sqlite3.OperationalError:
+            pass
+        conn.commit()
+
+    def _connect(self):
+        return thread_local_connection(self.db_path)
+
+    def start_run(self, run_id, inputs):
+        """Registers a run as running with the inputs it was started with (kept if it already exists)."""
+        inputs_dict = inputs if isinstance(inputs, dict) else vars(inputs)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, created_at, inputs) VALUES (?, ?, ?)",
+                (run_id, datetime.now().isoformat(), json.dumps(inputs_dict, default=str))
+            )
+            conn.execute("UPDATE runs SET status = 'running' WHERE run_id = ?", (run_id,))
+
+    def set_status(self, run_id, status):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE runs SET status = ? WHERE run_id = ?", (status, run_id))
+
+    def save_run(self, run_id, business_context, inputs, tasks, status="completed"):
+        """
+        Stores (or replaces) a run. ``inputs`` is an InputData instance or a
+        plain dict; ``tasks`` maps task number to the analyzed task dict.
+        """
+        inputs_dict = inputs if isinstance(inputs, dict) else vars(inputs)
+        conn = self._connect()
+        with conn:
+            created = conn.execute("SELECT created_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, created_at, business_context, inputs, status) VALUES (?, ?, ?, ?, ?)",
+                (run_id, created[0] if created else datetime.now().isoformat(),
+                 json.dumps(business_context, default=str), json.dumps(inputs_dict, default=str), status)
+            )
+            conn.execute("DELETE FROM run_tasks WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                "INSERT INTO run_tasks (run_id, task_number, task) VALUES (?, ?, ?)",
+                [(run_id, number, json.dumps(task, default=str)) for number, task in tasks.items()]
+            )
+
+    def load_run(self, run_id):
+        """Returns ``{"run_id", "created_at", "status", "business_context", "inputs", "tasks"}`` or None if unknown."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT created_at, business_context, inputs, status FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task_rows = conn.execute(
+            "SELECT task_number, task FROM run_tasks WHERE run_id = ? ORDER BY task_number", (run_id,)
+        ).fetchall()
+        return {
+            "run_id": run_id,
+            "created_at": row[0],
+            "status": row[3],
+            "business_context": json.loads(row[1]) if row[1] else {},
+            "inputs": json.loads(row[2]) if row[2] else {},
+            "tasks": {number: json.loads(task) for number, task in task_rows}
+        }
+
+    def save_checkpoint(self, run_id, stage, value):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, value, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, stage, json.dumps(value, default=str), datetime.now().isoformat())
+            )
+
+    def load_checkpoints(self, run_id):
+        """Returns ``{stage: value}`` of every checkpoint stored for the run."""
+        rows = self._connect().execute(
+            "SELECT stage, value FROM checkpoints WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return {stage: json.loads(value) for stage, value in rows}
+
+    def clear_checkpoints(self, run_id, namespace=None):
+        """Deletes the run's checkpoints, or only those under ``namespace``."""
+        conn = self._connect()
+        with conn:
+            if namespace:
+                conn.execute("DELETE FROM checkpoints WHERE run_id = ? AND stage LIKE ?", (run_id, f"{namespace}:%"))
+            else:
+                conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+
+
+class RunCheckpoints:
+    """
+    Checkpoint view of one pipeline (``namespace``) within a run.
+
+    ``run(stage, compute)`` returns the stored value if ``stage`` already
+    completed (when resuming), otherwise computes, stores and returns it.
+    A fresh (non-resumed) pipeline starts with its old checkpoints cleared.
+    """
+
+    def __init__(self, store, run_id, resume=False, namespace="workflow"):
+        self.store = store
+        self.run_id = run_id
+        self.namespace = namespace
+        if resume:
+            prefix = f"{namespace}:"
+            self.completed = {
+                stage[len(prefix):]: value
+                for stage, value in store.load_checkpoints(run_id).items() if stage.startswith(prefix)
+            }
+        else:
+            store.clear_checkpoints(run_id, namespace)
+            self.completed = {}
+
+    def get(self, stage):
+        """Stored value of a completed stage (a copy callers may mutate), or None."""
+        value = self.completed.get(stage)
+        return copy.deepcopy(value) if value is not None else None
+
+    def save(self, stage, value):
+        self.store.save_checkpoint(self.run_id, f"{self.namespace}:{stage}", value)
+
+    def run(self, stage, compute, is_complete=lambda value: value is not None):
+        value = self.get(stage)
+        if value is not None:
+            print(f"⏩ Resuming run {self.run_id}: '{stage}' already completed")
+            return value
+        value = compute()
+        if is_complete(value):
+            self.save(stage, value)
+        return value
+
+
+# Shared store for main.main runs, checkpoints and the /what-if endpoint
+run_store = RunStore()
@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Upper bound on nodes of one graph running at the same time
+DAG_MAX_WORKERS = int(os.getenv("DAG_MAX_WORKERS", "3"))
+
+
+def run_dag(nodes, dependencies, max_workers=DAG_MAX_WORKERS):
+    """
+    Runs ``nodes`` (``{name: callable()}``) in dependency order.
+
+    ``dependencies`` maps a node to the names it needs. Every node whose
+    dependencies have finished is started right away, so independent nodes
+    run concurrently and the wall time follows the longest dependency chain.
+    If a node raises, the nodes depending on it are never started while
+    independent ones still run to completion; the first error is re-raised
+    once nothing is left running. Returns ``{name: result}``.
+    """
+    unknown = {dep for deps in dependencies.values() for dep in deps} - set(nodes)
+    if unknown:
+        raise ValueError(f"Unknown dependencies: {', '.join(sorted(unknown))}")
+
+    results = {}
+    pending = set(nodes)
+    running = {}
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while True:
+            ready = [name for name in pending if all(dep in results for dep in dependencies.get(name, ()))]
+            for name in sorted(ready, key=list(nodes).index):
+                pending.discard(name)
+                running[executor.submit(nodes[name])] = name
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    error = error or e
+
+    if error is not None:
+        raise error
+    if pending:
+        raise ValueError(f"Dependency cycle between: {', '.join(sorted(pending))}")
+    return results
@@ -0,0 +1,65 @@
+import threading
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Answer cache looked up by embedding similarity instead of exact text.
+
+    Every entry belongs to a ``scope`` (e.g. the report version and whether
+    report context was used) and is only matched within it. Each scope keeps
+    up to ``max_entries`` of its own entries; ``invalidate()`` drops them all,
+    so answers never outlive the report they were generated from.
+    """
+
+    def __init__(self, similarity_threshold=0.92, max_entries=500):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._scopes = {}  # scope -> (vectors, entries)
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype='float32')
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def invalidate(self):
+        with self._lock:
+            self._scopes = {}
+
+    def lookup(self, embedding, scope):
+        """Returns ``(value, similarity)`` of the closest entry above the threshold, else ``(None, best)``."""
+        with self._lock:
+            vectors, entries = self._scopes.get(scope, (None, []))
+            if vectors is None or not entries:
+                self.misses += 1
+                return None, 0.0
+
+            similarities = vectors @ self._normalize(embedding)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity >= self.similarity_threshold:
+                self.hits += 1
+                return entries[best], similarity
+            self.misses += 1
+            return None, similarity
+
+    def store(self, embedding, value, scope):
+        with self._lock:
+            vectors, entries = self._scopes.get(scope, (None, []))
+            vector = self._normalize(embedding)[np.newaxis, :]
+            vectors = vector if vectors is None else np.vstack([vectors, vector])
+            entries.append(value)
+            if len(entries) > self.max_entries:
+                # Oldest entries go first
+                vectors = vectors[-self.max_entries:]
+                entries = entries[-self.max_entries:]
+            self._scopes[scope] = (vectors, entries)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": sum(len(entries) for _, entries in self._scopes.values())}
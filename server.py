@@ -1,12 +1,18 @@
-from flask import Flask, request, jsonify
-from main import main  # assuming main() is in main.py
+from flask import Flask, request, jsonify, Response, stream_with_context
+from main import main, run_what_if  # assuming main() is in main.py
 from inputs import InputData
 from rag_implementation import main1
-from qanda import initialize_chatbot, get_chatbot_response  # <-- Import your chatbot logic
+from qanda import initialize_chatbot, get_chatbot_response, stream_chatbot_response, reload_workflow_report, chatbot_health_check  # <-- Import your chatbot logic
+from jobs import submit_job, get_job_status, get_job_result
+from run_store import run_store, new_run_id
+import json
 import os
 
 app = Flask(__name__)
 
+# One-time chatbot setup; later report changes are picked up by qanda's change detection
+print("Chatbot initialization:", initialize_chatbot())
+
 # Helper to build InputData from JSON
 def build_input_data_from_json(data):
     inputs = InputData()
@@ -23,6 +29,17 @@ def build_input_data_from_json(data):
     inputs.step7_inputs = data.get("step7_inputs", {})
     return inputs
 
+def _is_truthy(value):
+    return str(value).lower() in ("1", "true", "yes")
+
+def execute_workflow(report_progress, inputs, run_id=None, resume=False):
+    """Full run used by async jobs: 7-step workflow, then the RAG pipeline."""
+    report_progress("workflow")
+    summary = main(inputs, run_id=run_id, resume=resume)
+    report_progress("rag_pipeline")
+    main1(run_id=run_id, resume=resume, summaries=summary)
+    return summary
+
 @app.route('/run-workflow', methods=['POST'])
 def run_workflow():
     data = request.get_json()
@@ -30,10 +47,89 @@ def run_workflow():
         return jsonify({"error": "Invalid or missing JSON"}), 400
 
     inputs = build_input_data_from_json(data)
-    summary = main(inputs)  # Call your workflow
-    main1()
+    run_id = new_run_id()
+
+    # Async mode: hand the run to the background pool and return a job id right away
+    if _is_truthy(request.args.get("async", data.get("async", False))):
+        job_id = submit_job(execute_workflow, inputs, run_id=run_id)
+        return jsonify({
+            "job_id": job_id,
+            "run_id": run_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result"
+        }), 202
+
+    summary = main(inputs, run_id=run_id)  # Call your workflow
+    main1(run_id=run_id, summaries=summary)
+
+    # The run id is what /what-if needs to revisit this run's numbers
+    return jsonify(summary), 200, {"X-Run-Id": run_id}
+
+@app.route('/runs/<run_id>/resume', methods=['POST'])
+def resume_run(run_id):
+    data = request.get_json(silent=True) or {}
+    run = run_store.load_run(run_id)
+    if run is None:
+        return jsonify({"error": f"Unknown run '{run_id}'"}), 404
+
+    # Finished steps come from the run's checkpoints; only the rest call Gemini again
+    if _is_truthy(request.args.get("async", data.get("async", False))):
+        job_id = submit_job(execute_workflow, None, run_id=run_id, resume=True)
+        return jsonify({
+            "job_id": job_id,
+            "run_id": run_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result"
+        }), 202
+
+    summary = main(run_id=run_id, resume=True)
+    main1(run_id=run_id, resume=True, summaries=summary)
+    return jsonify(summary), 200, {"X-Run-Id": run_id}
 
-    return jsonify(summary)
+@app.route('/what-if', methods=['POST'])
+def what_if():
+    data = request.get_json()
+    if not data or "run_id" not in data:
+        return jsonify({"error": "Missing 'run_id' in JSON"}), 400
+
+    overrides = data.get("roi_inputs", {})
+    if not isinstance(overrides, dict):
+        return jsonify({"error": "'roi_inputs' must be an object"}), 400
+
+    task_numbers = data.get("task_numbers")
+    if task_numbers is not None and not (
+        isinstance(task_numbers, list)
+        and all(isinstance(n, int) and not isinstance(n, bool) for n in task_numbers)
+    ):
+        return jsonify({"error": "'task_numbers' must be a list of integers"}), 400
+
+    try:
+        result = run_what_if(data["run_id"], overrides, task_numbers)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"error": f"Unknown run '{data['run_id']}'"}), 404
+    return jsonify(result)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = get_job_status(job_id)
+    if status is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = get_job_result(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    if job["status"] == "failed":
+        return jsonify({"job_id": job_id, "status": "failed", "error": job["error"]}), 500
+    if job["status"] != "succeeded":
+        return jsonify({"job_id": job_id, "status": job["status"], "stage": job["stage"]}), 202
+    return jsonify(job["result"])
 
 @app.route('/ask-chatbot', methods=['POST'])
 def ask_chatbot():
@@ -45,15 +141,35 @@ def ask_chatbot():
     chat_history = data.get("chat_history", [])
     include_context = data.get("include_report_context", True)
 
-    # Ensure chatbot is initialized
-    init_result = initialize_chatbot()
-    if init_result.get("status") != "success":
-        return jsonify({"error": "Chatbot initialization failed", "details": init_result}), 500
+    # Startup initialization normally covers this; only retry if it failed
+    if not chatbot_health_check()["gemini_model_ready"]:
+        init_result = initialize_chatbot()
+        if init_result.get("status") != "success":
+            return jsonify({"error": "Chatbot initialization failed", "details": init_result}), 500
+
+    # Streaming mode: relay Gemini chunks to the client as Server-Sent Events
+    if _is_truthy(request.args.get("stream", data.get("stream", False))):
+        def event_stream():
+            for event in stream_chatbot_response(question, chat_history, include_context):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+        return Response(
+            stream_with_context(event_stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
 
     # Get chatbot response
     response = get_chatbot_response(question, chat_history, include_context)
     return jsonify(response)
 
+@app.route('/reload-report', methods=['POST'])
+def reload_report():
+    # Always the configured report; clients must not pick which host file the chatbot reads
+    result = reload_workflow_report()
+    status_code = 200 if result.get("status") == "success" else 500
+    return jsonify(result), status_code
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
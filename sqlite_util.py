@@ -0,0 +1,29 @@
+import sqlite3
+import threading
+
+# Seconds a connection waits on another writer's lock before failing
+SQLITE_BUSY_TIMEOUT = 30
+
+_local = threading.local()
+
+
+def connect(db_path, check_same_thread=True):
+    """
+    New connection in WAL mode, so readers never block on writers and
+    several processes can share the file.
+    """
+    conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def thread_local_connection(db_path):
+    """The calling thread's connection to ``db_path``; sqlite3 connections are not shareable across threads."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = conns[db_path] = connect(db_path)
+    return conn
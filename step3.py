@@ -67,4 +67,5 @@ def step3_identify_bottlenecks(selected_task, inputs):
         print(f"  🛠 Tools: {result['ai_tools_or_methods']}")
         print(f"  🧮 Effort: {result['expected_effort']}, 📈 Impact: {result['expected_impact']}")
     else:
-        print("⚠️ AI inference failed. You may retry or enter data manually.")
+        # Fail loudly so a checkpointed run can be resumed from this step
+        raise RuntimeError(f"Step 3 bottleneck analysis failed for task: {task_name}")
@@ -119,4 +119,4 @@ def step4_match_to_ai_primitives(selected_task):
         print(f"📈 AI Readiness Score: {result['ai_readiness_score']}/10")
         print(f"⚙️ Automation Complexity: {result['automation_complexity']}")
     else:
-        print("❗ AI primitive matching failed. You may retry later or collect inputs manually.")
+        raise RuntimeError(f"Step 4 AI primitive matching failed for task: {selected_task.get('task_name')}")
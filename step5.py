@@ -112,4 +112,4 @@ def step5_human_in_the_loop_check_and_data(selected_task):
         print(f"🤖 Regulations: {', '.join(insights['data_sensitivity']['regulations'])}")
         print(f"🤖 Mitigation Strategy: {insights['data_sensitivity']['recommended_mitigation']}")
     else:
-        print("⚠️ AI analysis failed. Please enter these details manually.")
+        raise RuntimeError(f"Step 5 human-in-the-loop assessment failed for task: {selected_task.get('task_name')}")
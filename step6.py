@@ -1,4 +1,5 @@
 from helper import call_gemini_api
+from roi_engine import apply_roi_metrics, simulate_roi
 # from inputs import roi_inputs
 
 def step6_roi_feasibility_and_implementation(selected_task, business_context, inputs):
@@ -58,28 +59,21 @@ def step6_roi_feasibility_and_implementation(selected_task, business_context, in
     }
 
     ai_inferred = call_gemini_api(prompt_text=inference_prompt, schema=inference_schema)
+    if not ai_inferred:
+        # Fail loudly so a checkpointed run can be resumed from this step
+        raise RuntimeError(f"Step 6 ROI inference failed for task: {selected_task.get('task_name')}")
     selected_task.update(ai_inferred)
 
     # --- Calculations ---
-    time_saved_per_task = (
-        selected_task['current_time_per_task_minutes'] *
-        selected_task['people_involved_count'] *
-        (selected_task['estimated_time_saved_percent'] / 100)
-    )
-    selected_task['calculated_time_saved_per_task_minutes'] = round(time_saved_per_task, 2)
-
-    total_time_saved_hours = (time_saved_per_task * selected_task['tasks_per_month']) / 60
-    selected_task['calculated_total_time_saved_per_month_hours'] = round(total_time_saved_hours, 2)
-
-    cost_saving = total_time_saved_hours * selected_task['avg_hourly_cost_per_employee']
-    selected_task['calculated_potential_cost_saving_per_month'] = round(cost_saving, 2)
+    apply_roi_metrics(selected_task)
 
-    if cost_saving > 0 and selected_task['estimated_investment_cost'] > 0:
-        selected_task['estimated_payback_period_months'] = round(
-            selected_task['estimated_investment_cost'] / cost_saving, 1
-        )
-    else:
-        selected_task['estimated_payback_period_months'] = "N/A"
+    # --- Monte Carlo ranges around the point estimate ---
+    simulation = simulate_roi(selected_task)
+    selected_task['roi_simulation'] = simulation
+    if simulation:
+        saving, payback = simulation['monthly_cost_saving'], simulation['payback_months']
+        print(f"🎲 Simulated monthly saving P10/P50/P90: ${saving['p10']} / ${saving['p50']} / ${saving['p90']}")
+        print(f"🎲 Simulated payback (months) P10/P50/P90: {payback['p10']} / {payback['p50']} / {payback['p90']}")
 
     # --- AI Feasibility Analysis ---
     print("\n--- AI Readiness & Feasibility Analysis (Gemini) ---")
@@ -132,6 +126,8 @@ def step6_roi_feasibility_and_implementation(selected_task, business_context, in
     }
 
     ai_analysis = call_gemini_api(prompt_text=feasibility_prompt, schema=feasibility_schema)
+    if not ai_analysis:
+        raise RuntimeError(f"Step 6 feasibility analysis failed for task: {selected_task.get('task_name')}")
     selected_task['ai_feasibility_analysis'] = ai_analysis
 
     print(f"\n🎯 Gemini AI Analysis Summary:")
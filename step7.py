@@ -48,6 +48,8 @@ def step7_monitoring_feedback_integration_strategy(selected_task, business_conte
     }
 
     ai_inferred = call_gemini_api(prompt_text=ai_prompt, schema=ai_schema)
+    if not ai_inferred:
+        raise RuntimeError(f"Step 7 inference failed for task: {selected_task.get('task_name')}")
 
     # Merge AI inferred details into selected_task
     selected_task.update(ai_inferred)
@@ -0,0 +1,63 @@
+import copy
+import os
+from helper import GEMINI_MODEL
+from response_cache import PersistentCache, make_cache_key, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+from dotenv import load_dotenv
+load_dotenv()
+
+STEP_CACHE_PATH = os.getenv("STEP_CACHE_PATH", "data/step_cache.db")
+STEP_CACHE_ENABLED = os.getenv("STEP_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+# Bump when a step's prompt or output handling changes so stale outputs are not reused
+STEP_CACHE_VERSION = 1
+
+# Outputs of whole workflow steps, keyed by a fingerprint of exactly the inputs each step reads
+step_cache = PersistentCache(db_path=STEP_CACHE_PATH, table="step_outputs",
+                             ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+
+
+def step_key(step_name, step_inputs):
+    return make_cache_key("step", STEP_CACHE_VERSION, GEMINI_MODEL, step_name, step_inputs)
+
+
+def memoized_step(step_name, step_inputs, compute, is_complete=bool):
+    """
+    Returns the cached result of ``compute()`` for these ``step_inputs``, or
+    runs it and caches the result if ``is_complete(result)`` holds (failed
+    or empty outputs are never cached).
+    """
+    key = step_key(step_name, step_inputs)
+    if STEP_CACHE_ENABLED:
+        cached = step_cache.get(key)
+        if cached is not None:
+            print(f"\n⚡ Reusing cached {step_name} output")
+            return cached
+
+    result = compute()
+    if STEP_CACHE_ENABLED and is_complete(result):
+        step_cache.set(key, result)
+    return result
+
+
+def memoized_task_step(step_name, step_inputs, task, compute):
+    """
+    Memoizes a step that updates ``task`` in place.
+
+    The cache stores only the fields the step added or changed, and a hit
+    applies them to ``task`` without running the step. Steps that leave the
+    task untouched (e.g. a failed Gemini call) are not cached. Returns the
+    added or changed fields.
+    """
+    key = step_key(step_name, step_inputs)
+    if STEP_CACHE_ENABLED:
+        delta = step_cache.get(key)
+        if delta is not None:
+            print(f"\n⚡ Reusing cached {step_name} output for task: {task.get('task_name')}")
+            task.update(delta)
+            return delta
+
+    before = copy.deepcopy(task)
+    compute(task)
+    delta = {field: value for field, value in task.items() if field not in before or before[field] != value}
+    if STEP_CACHE_ENABLED and delta:
+        step_cache.set(key, delta)
+    return delta